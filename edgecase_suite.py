@@ -1,36 +1,27 @@
 import argparse
-import time
 import unittest
 import sys
 
+from source import dataset
+from source import freshness_probe
+from source import metrics
+from source import profiler
+from source import query_scaling
+from source import rest_call
+from source import result_writer
+from source import server_stats
+from source import test_registry
+from source import tracing
 from source.insert_data_files import insert_data as insert_data_files
 from source.insert_data_null import insert_data as insert_data_null
 from source.rest_call import flush_buffer, get_data
-from source.colorized_test import SilentRunner
+from source import colorized_test
+from source.colorized_test import SilentRunner, TimedResult
 
-from tests.test_ready_to_go import TestQueryDataReady
-from tests.test_sql_queries import TestSQLCommands
-from tests.test_timestamp_queries import TestTimestampCommands
-from tests.test_anylog_cli import TestAnyLogCommands
-from tests.test_blockchain_policies import TestBlockchainPolicies
-from tests.test_null_data import TestNullData
 
-
-def _list_methods(cls_name):
-    list_methods = []
-    for tname in unittest.TestLoader().loadTestsFromTestCase(cls_name):
-        list_methods.append(tname._testMethodName)
-    return list_methods
-
-
-def _print_test_cases():
-    test_cases = {
-        'anylog':     _list_methods(TestAnyLogCommands),
-        'blockchain': _list_methods(TestBlockchainPolicies),
-        'sql':        _list_methods(TestSQLCommands),
-        'timestamp': _list_methods(TestTimestampCommands),
-        'null_data': _list_methods(TestNullData)
-    }
+def _print_test_cases(test_groups:dict):
+    # groups marked with * only run when selected with --select-test
+    test_cases = {name if group['run_by_default'] else f"{name}*": group['tests'] for name, group in test_groups.items()}
 
     # Find the longest "key:" length (including colon)
     longest = max(len(name) + 1 for name in test_cases)  # +1 for colon
@@ -40,6 +31,8 @@ def _print_test_cases():
         key = f"{tname}:"
         padded = key.ljust(longest)  # pad after colon so lists align
         lines.append(f"\n  - {padded}  {', '.join(tests)}")
+    if any(not group['run_by_default'] for group in test_groups.values()):
+        lines.append("\n  (* only run when selected with --select-test)")
 
     return "".join(lines)
 
@@ -91,81 +84,112 @@ def _run_test(test_class_name, test_name: str = None, ignore_skip: bool = False,
     if not test_name:
         runner = SilentRunner(verbosity=verbose)
     else:
-        runner = unittest.TextTestRunner(verbosity=verbose)
+        runner = unittest.TextTestRunner(verbosity=verbose, resultclass=TimedResult)
 
     runner.run(suite)
     sys.stdout.flush()
-    time.sleep(0.5)
+    tracing.sleep(0.5)
 
 """
 Validate data has been inserted properly into database(s), if fails cannot continue with testing
 """
 def validation_test(query_conn:str, db_name:str, test_name:str, ignore_skip:bool=True, verbose:int=2):
+    from tests.test_ready_to_go import TestQueryDataReady
+
     print("Validating `system_query` exists and table row count")
     sys.stdout.flush()
-    time.sleep(0.5)
+    tracing.sleep(0.5)
 
     TestQueryDataReady.conn = query_conn
     TestQueryDataReady.db_name = db_name
 
-    _run_test(test_class_name=TestQueryDataReady, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
+    with tracing.span("validation", category='phase'), profiler.phase("validation"):
+        _run_test(test_class_name=TestQueryDataReady, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
 
     return TestQueryDataReady.testing_ready
 
-def anylog_test(query_conn:str, operator_conn:str, db_name:str, test_name:str, ignore_skip:bool=False, verbose:int=2):
-    print("Testing related to Node status and configuration")
-    sys.stdout.flush()
-    time.sleep(0.5)
-
-    TestAnyLogCommands.query = query_conn
-    TestAnyLogCommands.operator = operator_conn
-    TestAnyLogCommands.db_name = db_name
-
-    _run_test(test_class_name=TestAnyLogCommands, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
-
-
-def blockchain_test(query_conn:str, is_standalone:bool=False, test_name:str=None, ignore_skip:bool=False, verbose:int=2):
-    print("Testing related to blockchain policy params and relationships")
+def group_test(group:dict, settings:dict, test_name:list=None, ignore_skip:bool=False, verbose:int=2):
+    """
+    Import a (discovered) test group, set its connection params and run it
+    """
+    print(group['description'])
     sys.stdout.flush()
-    time.sleep(0.5)
-
-    TestBlockchainPolicies.query = query_conn
-    TestBlockchainPolicies.is_standalone = is_standalone
+    tracing.sleep(0.5)
 
-    _run_test(test_class_name=TestBlockchainPolicies, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
-
-
-def sql_test(query_conn:str, db_name:str, test_name:str=None, ignore_skip:bool=False, verbose:int=2):
-    print("Testing related to (basic) data queries")
-    sys.stdout.flush()
-    time.sleep(0.5)
+    with tracing.span(f"test group {group['name']}", category='phase'), profiler.phase(f"test group {group['name']}"):
+        test_class = test_registry.load(group)
+        test_registry.configure(test_class, settings)
 
-    TestSQLCommands.conn = query_conn
-    TestSQLCommands.db_name = db_name
+        _run_test(test_class_name=test_class, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
 
-    _run_test(test_class_name=TestSQLCommands, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
+def run_suite(args, test_groups:dict):
+    """
+    Insert data (unless skipped), validate it and run the selected test groups
+    """
+    # insert data
+    testing_ready = True
+    if not args.skip_insert:
+        print("Inserting Data")
+        sys.stdout.flush()
+        tracing.sleep(0.5)
+        with tracing.span("insert data files", category='phase'), profiler.phase("insert data files"):
+            insert_data_files(conns=args.operator, db_name=args.db_name, sort_timestamps=args.sort_timestamps, batch=args.batch, workers=args.workers, adaptive=args.adaptive_batch,
+                              query_conn=args.query, force=args.force_insert)
+        with tracing.span("flush buffers", category='phase'), profiler.phase("flush buffers"):
+            flush_buffer(conn=args.operator)
+        with tracing.span("insert null data", category='phase'), profiler.phase("insert null data"):
+            insert_data_null(conns=args.operator, db_name=args.db_name, query_conn=args.query, force=args.force_insert)
 
+        testing_ready = validation_test(query_conn=args.query, db_name=args.db_name, test_name=args.select_test, ignore_skip=True, verbose=args.verbose)
 
-def timestamp_test(query_conn:str, db_name:str, test_name:str=None, ignore_skip:bool=False, verbose:int=2):
-    print("Testing related to timestamp / timezone formatting queries")
-    sys.stdout.flush()
-    time.sleep(0.5)
+    # run query test
+    if not args.skip_test and testing_ready:
+        settings = {
+            'conn': args.query,
+            'query': args.query,
+            'operator': args.operator,
+            'db_name': args.db_name,
+            'is_standalone': args.is_standalone,
+            'destinations': args.destinations.split(",") if args.destinations else None
+        }
 
-    TestTimestampCommands.conn = query_conn
-    TestTimestampCommands.db_name = db_name
+        selected_tests = {}
+        if args.select_test:
+            for test_case in args.select_test.strip().split(","):
+                test_name = None
+                if '.' in test_case:
+                    test_case, test_name = test_case.split(".")
 
-    _run_test(test_class_name=TestTimestampCommands, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
+                group_name = test_registry.resolve(test_case.strip(), test_groups)
+                if not group_name:
+                    print(f"Unknown test group `{test_case.strip()}` (options: {', '.join(test_groups)})")
+                    continue
+                if group_name not in selected_tests:
+                    selected_tests[group_name] = []
+                if test_name:
+                    selected_tests[group_name].append(test_name.strip())
+        else:
+            selected_tests = {name: None for name, group in test_groups.items() if group['run_by_default']}
 
+        for group_name, test_name in selected_tests.items():
+            group_test(group=test_groups[group_name], settings=settings, test_name=test_name,
+                       ignore_skip=args.ignore_skip, verbose=args.verbose)
 
-def null_data_test(query_conn:str, db_name:str, test_name:str, skip_insert:bool=False, ignore_skip:bool=False, verbose:int=2):
-    print("Testing related to Null or Empty data")
-    sys.stdout.flush()
-    time.sleep(0.5)
+    # ingest-to-query freshness, without and with an explicit flush
+    if args.freshness > 0 and testing_ready:
+        with tracing.span("freshness", category='phase'), profiler.phase("freshness"):
+            results = [freshness_probe.run_probe(query_conn=args.query, operators=args.operator, db_name=args.db_name,
+                                                 markers=args.freshness, rate=args.freshness_rate, flush=flush)
+                       for flush in (False, True)]
+        print(freshness_probe.report(results))
 
-    TestNullData.query = query_conn
-    TestNullData.db_name = db_name
+    # concurrent query scaling curve
+    if args.query_scaling > 0 and testing_ready:
+        with tracing.span("query scaling", category='phase'), profiler.phase("query scaling"):
+            results = query_scaling.run_scaling(conn=args.query, db_name=args.db_name, max_clients=args.query_scaling,
+                                                duration=args.scaling_duration)
+        print(query_scaling.report(results))
 
-    _run_test(test_class_name=TestNullData, test_name=test_name, ignore_skip=ignore_skip, verbose=verbose)
 
 def main():
     """
@@ -177,79 +201,114 @@ def main():
         -h, --help            show this help message and exit
         --sort-timestamps   [SORT_TIMESTAMPS]   Insert values in chronological order
         --batch             [BATCH]             Insert a single data batch
+        --workers           WORKERS             Number of worker processes used to parse / encode data files
+        --no-cache          [NO_CACHE]          Parse data files directly, without the binary dataset cache
+        --adaptive-batch    [ADAPTIVE_BATCH]    Adjust rows per PUT / PUTs in flight (AIMD) based on observed latency and errors
         --skip-insert       [SKIP_INSERT]       Skip data insertion
+        --force-insert      [FORCE_INSERT]      Insert every table, even the ones already in the database (fingerprint check skipped)
         --skip-test         [SKIP_TEST]         Skip running unit tests
         --verbose           VERBOSE             Test verbosity level (0, 1, 2)
         --select-test       SELECT_TEST         (comma separated) specific test(s) to run
+        --metrics           [METRICS]           Print a per node / command request latency histogram at the end of the run
+        --metrics-file      METRICS_FILE        Write request metrics in Prometheus text format into file
+        --timeout           TIMEOUT             Seconds to wait for a REST request to complete
+        --test-budget       TEST_BUDGET         Default time budget (seconds) per test
+        --slowest           SLOWEST             Number of slowest tests / subTests to list at the end of the run
+        --junit             JUNIT               Write test results as JUnit XML into file
+        --results-json      RESULTS_JSON        Write test results as JSON into file
+        --trace             TRACE               Write a Chrome Trace Event timeline of the run into file (ex. out.json)
+        --freshness         FRESHNESS           Number of marker rows used to measure ingest-to-query freshness (per mode)
+        --freshness-rate    FRESHNESS_RATE      Marker rows inserted per second by --freshness
+        --server-stats      [SERVER_STATS]      After the tests, re-run a stat=true copy of each (format=json) sql query against the network and each of --destinations, and report server vs client time
+        --profile           [PROFILE]           Profile each phase (cProfile + tracemalloc) into actual/profile_*.prof and actual/profile_summary.txt
+        --query-scaling     QUERY_SCALING       Replay the suite's queries from 1, 2, 4 ... QUERY_SCALING concurrent clients
+        --scaling-duration  SCALING_DURATION    Seconds to run each concurrency level of --query-scaling
     """
-    parse = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, epilog=f"\nList of Tests {_print_test_cases()}")
+    test_groups = test_registry.discover()
+    epilog = (f"\nList of Tests {_print_test_cases(test_groups)}"
+              f"\n\nIngest sweep (run on its own, see README): python3 -m source.ingest_sweep --help")
+    parse = argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter, epilog=epilog)
     parse.add_argument('--query',           required=True, type=str,                         default=None, help="Query node IP:port")
     parse.add_argument('--operator',        required=False, type=str,                         default=None, help="Comma-separated operator node IPs")
     parse.add_argument('--db-name',         required=False, type=str,                         default=None, help="Logical database name")
     parse.add_argument('--sort-timestamps', required=False, type=bool, nargs='?', const=True, default=False, help='Insert values in chronological order')
     parse.add_argument('--batch',           required=False, type=bool, nargs='?', const=True, default=False, help='Insert a single data batch')
+    parse.add_argument('--workers',         required=False, type=int,                         default=0,     help='Number of worker processes used to parse / encode data files (0 - parse in the insert threads)')
+    parse.add_argument('--no-cache',        required=False, type=bool, nargs='?', const=True, default=False, help='Parse data files directly, without the binary dataset cache')
+    parse.add_argument('--adaptive-batch',  required=False, type=bool, nargs='?', const=True, default=False, help='Start from --batch and adjust rows per PUT / PUTs in flight (AIMD) based on observed latency and errors')
     parse.add_argument('--skip-insert',     required=False, type=bool, nargs='?', const=True, default=False, help="Skip data insertion")
+    parse.add_argument('--force-insert',    required=False, type=bool, nargs='?', const=True, default=False, help="Insert every table, even the ones already in the database (by default only tables that are new or empty in the database are inserted)")
     parse.add_argument('--skip-test',       required=False, type=bool, nargs='?', const=True, default=False, help="Skip running unit tests")
     parse.add_argument('--verbose',         required=False, type=int,                         default=2,     help="Test verbosity level (0, 1, 2)")
     parse.add_argument('--select-test',     required=False, type=str,                         default=None, help="(comma separated) specific test(s) to run")
     parse.add_argument('--ignore-skip',     required=False, type=bool, nargs='?', const=True, default=False, help='run all tests, ignoring @unittest.skip cmd')
+    parse.add_argument('--destinations',    required=False, type=str,                         default=None, help="Comma-separated operator TCP IP:port (destination) values, used by the resiliency tests")
     parse.add_argument('--is-standalone',   required=False, type=bool, nargs='?', const=True, default=False, help="Node is a standalone instance (master, operator and query in 1 container")
+    parse.add_argument('--metrics',         required=False, type=bool, nargs='?', const=True, default=False, help='Print a per node / command request latency histogram at the end of the run')
+    parse.add_argument('--metrics-file',    required=False, type=str,                         default=None, help='Write request metrics in Prometheus text format into file')
+    parse.add_argument('--timeout',         required=False, type=float,                       default=rest_call.REQUEST_TIMEOUT, help='Seconds to wait for a REST request to complete')
+    parse.add_argument('--test-budget',     required=False, type=float,                       default=None, help='Default time budget (seconds) per test - tests over it are reported as OVER BUDGET / TIMEOUT')
+    parse.add_argument('--slowest',         required=False, type=int,                         default=10,   help='Number of slowest tests / subTests to list at the end of the run (0 - disable)')
+    parse.add_argument('--junit',           required=False, type=str,                         default=None, help='Write test results (status, duration, queries) as JUnit XML into file')
+    parse.add_argument('--results-json',    required=False, type=str,                         default=None, help='Write test results (status, duration, queries) as JSON into file')
+    parse.add_argument('--trace',           required=False, type=str,                         default=None, help='Write a Chrome Trace Event timeline of the run into file (ex. out.json)')
+    parse.add_argument('--server-stats',    required=False, type=bool, nargs='?', const=True, default=False, help="After the tests, re-run a stat=true copy of each (format=json) sql query against the network and each of --destinations, and report its server-side time / rows / nodes next to the client latency")
+    parse.add_argument('--profile',         required=False, type=bool, nargs='?', const=True, default=False, help='Profile each phase (cProfile + tracemalloc peak / top allocations) into actual/profile_*.prof and actual/profile_summary.txt')
+    parse.add_argument('--freshness',       required=False, type=int,                         default=0,    help='Insert FRESHNESS marker rows (without and with flush buffers) and report how long they take to become queryable (0 - disable)')
+    parse.add_argument('--freshness-rate',  required=False, type=float,                       default=2,    help='Marker rows inserted per second by --freshness')
+    parse.add_argument('--query-scaling',   required=False, type=int,                         default=0,    help="Replay the suite's queries from 1, 2, 4 ... QUERY_SCALING concurrent clients and report throughput / latency per level (0 - disable)")
+    parse.add_argument('--scaling-duration', required=False, type=float,                      default=10,   help='Seconds to run each concurrency level of --query-scaling')
     args = parse.parse_args()
 
     args.operator = args.operator.split(",")
-
-    # insert data
-    testing_ready = True
-    if not args.skip_insert:
-        print("Inserting Data")
-        sys.stdout.flush()
-        time.sleep(0.5)
-        insert_data_files(conns=args.operator, db_name=args.db_name, sort_timestamps=args.sort_timestamps, batch=args.batch)
-        flush_buffer(conn=args.operator)
-        insert_data_null(conns=args.operator, db_name=args.db_name)
-
-        testing_ready = validation_test(query_conn=args.query, db_name=args.db_name, test_name=args.select_test, ignore_skip=True, verbose=args.verbose)
-
-    # run query test
-    if not args.skip_test and testing_ready:
-        selected_tests = {}
-        if args.select_test:
-            for test_case in args.select_test.strip().split(","):
-                test_name = None
-                if '.' in test_case:
-                    test_case, test_name = test_case.split(".")
-
-                if test_case not in selected_tests:
-                    selected_tests[test_case] = []
-                if test_name:
-                    selected_tests[test_case].append(test_name.strip())
-
-            # for test_case in selected_tests:
-            #     selected_tests[test_case] = dict(selected_tests[test_case])
-
-            for test_case in selected_tests:
-                if test_case == 'anylog':
-                    anylog_test(query_conn=args.query, operator_conn=args.operator, db_name=args.db_name, test_name=selected_tests[test_case], ignore_skip=args.ignore_skip, verbose=args.verbose)
-                if test_case == 'blockchain':
-                    blockchain_test(query_conn=args.query, is_standalone=args.is_standalone, test_name=selected_tests[test_case], ignore_skip=args.ignore_skip, verbose=args.verbose)
-                if test_case == "sql":
-                    sql_test(query_conn=args.query, db_name=args.db_name, test_name=selected_tests[test_case], ignore_skip=args.ignore_skip, verbose=args.verbose)
-                if test_case == "timestamp":
-                    timestamp_test(query_conn=args.query, db_name=args.db_name, test_name=selected_tests[test_case], ignore_skip=args.ignore_skip, verbose=args.verbose)
-                if test_case == 'null':
-                    null_data_test(query_conn=args.query, db_name=args.db_name, test_name=selected_tests[test_case], ignore_skip=args.ignore_skip, verbose=args.verbose)
-
-        else:
-            anylog_test(query_conn=args.query, operator_conn=args.operator, db_name=args.db_name, test_name=args.select_test, ignore_skip=args.ignore_skip, verbose=args.verbose)
-            blockchain_test(query_conn=args.query, is_standalone=args.is_standalone, test_name=args.select_test, ignore_skip=args.ignore_skip, verbose=args.verbose)
-            sql_test(query_conn=args.query, db_name=args.db_name, test_name=args.select_test, ignore_skip=args.ignore_skip, verbose=args.verbose)
-            timestamp_test(query_conn=args.query, db_name=args.db_name, test_name=args.select_test, ignore_skip=args.ignore_skip, verbose=args.verbose)
-            null_data_test(query_conn=args.query, db_name=args.db_name, test_name=args.select_test, ignore_skip=args.ignore_skip, verbose=args.verbose)
-
-
-
-
+    dataset.USE_CACHE = not args.no_cache
+    rest_call.REQUEST_TIMEOUT = args.timeout if args.timeout and args.timeout > 0 else None
+    colorized_test.DEFAULT_BUDGET = args.test_budget
+
+    aggregator = None
+    if args.metrics_file:
+        aggregator = metrics.PrometheusFileSink(file_path=args.metrics_file)
+    elif args.metrics:
+        aggregator = metrics.MetricsAggregator()
+    if aggregator:
+        rest_call.add_sink(aggregator)
+    if args.trace:
+        rest_call.add_sink(tracing.start())
+    if args.junit or args.results_json:
+        colorized_test.collect_requests()
+    if args.profile:
+        profiler.start()
+    stats = None
+    if args.server_stats:
+        stats = server_stats.ServerStats()
+        rest_call.add_sink(stats)
+
+    try:
+        run_suite(args=args, test_groups=test_groups)
+    finally:
+        if stats:
+            rest_call.remove_sink(stats)
+            stats.replay(destinations=args.destinations.split(",") if args.destinations else None)
+            stats.summarize()
+            stats.attach(colorized_test.TEST_TIMINGS)
+            print(stats.report())
+        if args.slowest > 0 and colorized_test.TEST_TIMINGS:
+            print(colorized_test.slowest_report(count=args.slowest))
+        if args.junit:
+            result_writer.write_junit(timings=colorized_test.TEST_TIMINGS, file_path=args.junit)
+        if args.results_json:
+            result_writer.write_json(timings=colorized_test.TEST_TIMINGS, file_path=args.results_json)
+        if aggregator:
+            print(aggregator.report())
+            if args.metrics_file:
+                aggregator.write()
+        if args.trace:
+            tracing.TRACER.write(args.trace)
+            print(f"Trace written into {args.trace}")
+        if args.profile:
+            print(f"Profile summary written into {profiler.PROFILER.write_summary()}")
+            profiler.stop()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,172 @@
+"""
+Closed-loop (AIMD) batch sizing for ingest
+
+The table is sent in chunks of `rows` rows with up to `in_flight` PUTs running at the same time. After each PUT the
+controller
+    - increases rows (additive, +`step` rows) and every `in_flight` successes adds one more in-flight PUT, while the
+      PUT latency stays under `target_latency`
+    - halves rows and in-flight PUTs (multiplicative decrease) when a PUT fails or takes longer than `target_latency`
+so it keeps probing for more throughput and backs off as soon as an operator starts to struggle. PUTs that started
+before the last decrease are ignored, so a burst of slow responses only backs off once. The first chunk is
+INITIAL_ROWS rows, so the controller has room to grow even on small (1500 rows) tables.
+
+A chunk is only re-sent (smaller, to the next operator, up to MAX_RETRIES times) when its connection was refused, as
+the rows never reached the operator. Any other failure (a timeout, a reset connection, an HTTP error) fails the table:
+the operator may have accepted the rows, and sending them again would insert them twice.
+"""
+import itertools
+import threading
+import time
+
+from source import tracing
+from source.rest_call import put_data
+
+INITIAL_ROWS = 50
+MAX_RETRIES = 3
+LOG_INTERVAL = 1.0  # seconds between printed controller updates
+
+
+class AimdController:
+    def __init__(self, initial_rows:int, min_rows:int=1, max_rows:int=10000, step:int=None, max_in_flight:int=8,
+                 target_latency:float=1.0, name:str='ingest'):
+        self.min_rows = max(1, min_rows)
+        self.max_rows = max(self.min_rows, max_rows)
+        self.rows = min(max(initial_rows, self.min_rows), self.max_rows)
+        self.step = step or max(1, self.max_rows // 100)
+        self.in_flight = 1
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_latency = target_latency
+        self.name = name
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.history = []  # (seconds since start, rows, in_flight, reason)
+        self.start = time.time()
+        self.last_log = 0
+        self.lock = threading.Lock()
+        self._record('start')
+
+    def _record(self, reason:str):
+        elapsed = time.time() - self.start
+        self.history.append((round(elapsed, 3), self.rows, self.in_flight, reason))
+        tracing.counter(f"adaptive batch {self.name}", rows=self.rows, in_flight=self.in_flight)
+        if reason != 'increase' or elapsed - self.last_log >= LOG_INTERVAL:
+            self.last_log = elapsed
+            print(f"\t{self.name}: {elapsed:7.2f}s  rows/PUT={self.rows:<6} in-flight={self.in_flight:<3} ({reason})")
+
+    def observe(self, latency:float, error:bool=False, started:float=None):
+        """
+        Adjust rows / in_flight after a PUT completed - started is the time.perf_counter() value the PUT started at
+        """
+        with self.lock:
+            if started is not None and started < self.last_decrease:
+                return  # sent with the settings from before the last decrease
+            if error or latency > self.target_latency:
+                self.rows = max(self.min_rows, self.rows // 2)
+                self.in_flight = max(1, self.in_flight // 2)
+                self.successes = 0
+                self.last_decrease = time.perf_counter()
+                self._record('error' if error else f"slow {latency:.2f}s")
+                return
+
+            self.successes += 1
+            rows, in_flight = self.rows, self.in_flight
+            self.rows = min(self.max_rows, self.rows + self.step)
+            if self.successes >= self.in_flight:
+                self.in_flight = min(self.max_in_flight, self.in_flight + 1)
+                self.successes = 0
+            if (rows, in_flight) != (self.rows, self.in_flight):
+                self._record('increase')
+
+    def summary(self)->str:
+        rows = [entry[1] for entry in self.history]
+        in_flight = [entry[2] for entry in self.history]
+        return (f"{self.name}: rows/PUT {rows[0]} -> {rows[-1]} (min {min(rows)}, max {max(rows)}), in-flight "
+                f"{in_flight[0]} -> {in_flight[-1]} (max {max(in_flight)}), {len(self.history) - 1} adjustments")
+
+
+def _refused(error:Exception)->bool:
+    """
+    Whether the request failed because the connection was refused (the PUT was never sent)
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, ConnectionRefusedError):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def insert_table(conns:list, db_name:str, table_name:str, table, controller:AimdController=None, ordered:bool=False):
+    """
+    Send a ColumnarTable in controller-sized chunks - with ordered set, a single PUT is in flight at a time so the
+    rows arrive in table order
+    """
+    if not len(table):
+        return controller
+    if controller is None:
+        controller = AimdController(initial_rows=INITIAL_ROWS, name=table_name)
+    if ordered:
+        controller.max_in_flight = 1
+
+    position = 0
+    active = 0
+    errors = []
+    conn_cycle = itertools.cycle(conns)
+    condition = threading.Condition()
+
+    def _done():
+        nonlocal active
+        with condition:
+            active -= 1
+            condition.notify_all()
+
+    def _sender():
+        nonlocal active, position
+        while True:
+            with condition:
+                # wait for a free in-flight slot, then take the next `rows` rows
+                while active >= controller.in_flight and not errors and position < len(table):
+                    condition.wait()
+                if errors or position >= len(table):
+                    return
+                active += 1
+                start = position
+                position = min(len(table), position + controller.rows)
+                chunk, conn = table.slice(start, position), next(conn_cycle)
+            try:
+                _send_chunk(chunk, conn)
+            except Exception as error:
+                with condition:
+                    errors.append(error)
+            finally:
+                _done()
+
+    def _send_chunk(chunk, conn:str):
+        pending = [(chunk, 0)]
+        while pending:
+            rows, attempt = pending.pop(0)
+            start = time.perf_counter()
+            try:
+                put_data(conn=conn, payload=rows.serialize(), dbms=db_name, table=table_name)
+            except Exception as error:
+                controller.observe(latency=time.perf_counter() - start, error=True, started=start)
+                if attempt >= MAX_RETRIES or not _refused(error):
+                    raise
+                # re-send the rows in chunks of the (reduced) batch size
+                pending[:0] = [(part, attempt + 1) for part in rows.batches(controller.rows)]
+                with condition:
+                    conn = next(conn_cycle)
+                continue
+            controller.observe(latency=time.perf_counter() - start, started=start)
+
+    threads = [threading.Thread(target=_sender, name=f"{table_name}-put-{index}") for index in range(controller.max_in_flight)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise Exception(f"Failed to insert into {db_name}.{table_name} (Error: {errors[0]})")
+    print(f"\t{controller.summary()}")
+    return controller
@@ -1,10 +1,76 @@
 import io
+import threading
+import time
 import unittest
 
+from source import rest_call
+from source import tracing
+
 GREEN = "\033[92m"
 RED = "\033[91m"
+YELLOW = "\033[93m"
 RESET = "\033[0m"
 
+DEFAULT_BUDGET = None  # seconds allowed per test when not set with @time_budget (None - unlimited)
+TEST_TIMINGS = []      # every test / subTest run in this process: {'test', 'subtest', 'duration', 'budget', 'status', 'message', 'requests'}
+COLLECTOR = None       # RequestCollector attaching REST requests to the test that made them (see collect_requests)
+
+
+class RequestCollector:
+    """
+    rest_call sink keeping the requests made since the last test / subTest boundary (tests run one at a time)
+    """
+    def __init__(self):
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def record(self, event:dict):
+        with self.lock:
+            self.pending.append({
+                'command': event.get('command') or event.get('label'),
+                'node': event.get('node'),
+                'status': event.get('status'),
+                'error': event.get('error'),
+                'duration': event.get('total'),
+                'response_bytes': event.get('response_bytes')
+            })
+
+    def drain(self)->list:
+        with self.lock:
+            pending, self.pending = self.pending, []
+        return pending
+
+
+def collect_requests()->RequestCollector:
+    """
+    Start attaching the requests (query, node, status, response size) made by each test to TEST_TIMINGS
+    """
+    global COLLECTOR
+    if COLLECTOR is None:
+        COLLECTOR = RequestCollector()
+        rest_call.add_sink(COLLECTOR)
+    return COLLECTOR
+
+
+def time_budget(seconds:float):
+    """
+    Decorator setting the time budget of a test - requests made by the test are cut off once the budget is used, and
+    a test that runs over it is reported as OVER BUDGET / TIMEOUT rather than as a correctness failure
+    """
+    def decorator(func):
+        func.__time_budget__ = seconds
+        return func
+    return decorator
+
+
+def get_budget(test)->float:
+    method = getattr(test, test._testMethodName, None)
+    return getattr(method, '__time_budget__', DEFAULT_BUDGET)
+
+
+def _is_timeout(err)->bool:
+    return err is not None and issubclass(err[0], rest_call.RequestTimeout)
+
 
 class SilentStream(io.StringIO):
     """A stream that discards all writes (used to silence unittest default output)."""
@@ -14,14 +80,107 @@ class SilentStream(io.StringIO):
         pass
 
 
-class ColorizedResult(unittest.TextTestResult):
+class TimedResult(unittest.TextTestResult):
+    """
+    Record the duration of every test / subTest and apply per-test time budgets
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._test_start = time.time()
+        self._subtest_start = self._test_start
+        self._status = None
+        self._message = None
+        self._budget = None
 
     def _short(self, test):
-        return test._testMethodName
+        return getattr(test, '_testMethodName', str(test))  # class / module fixture errors have no test method
+
+    def _elapsed(self)->float:
+        return time.time() - self._test_start
+
+    def _over_budget(self)->bool:
+        return self._budget is not None and self._elapsed() > self._budget
+
+    def _record(self, test, status:str, subtest=None, duration:float=None, message:str=None):
+        TEST_TIMINGS.append({
+            'test': test.id(),
+            'subtest': subtest._subDescription() if subtest is not None else None,
+            'duration': duration if duration is not None else self._elapsed(),
+            'budget': self._budget,
+            'status': status,
+            'message': message,
+            'requests': COLLECTOR.drain() if COLLECTOR else []
+        })
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._test_start = time.time()
+        self._subtest_start = self._test_start
+        self._status = None
+        self._message = None
+        self._budget = get_budget(test)
+        if COLLECTOR:
+            COLLECTOR.drain()  # requests made outside of a test (ex. setUpClass)
+        if self._budget is not None:
+            rest_call.set_deadline(self._test_start + self._budget)
+
+    def stopTest(self, test):
+        rest_call.set_deadline(None)
+        super().stopTest(test)
+        tracing.complete(name=self._short(test), category='test', start=self._test_start, end=time.time(),
+                         test=test.id(), status=self._status)
+        self._record(test, self._status or 'success', message=self._message)
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        now = time.time()
+        if err is None:
+            status = 'success'
+        elif _is_timeout(err):
+            status = 'timeout'
+        else:
+            status = 'failure' if issubclass(err[0], test.failureException) else 'error'
+        if status != 'success' and self._status in (None, 'success'):
+            self._status = status
+        tracing.complete(name=subtest._subDescription(), category='subtest', start=self._subtest_start, end=now,
+                         test=test.id(), status=status)
+        self._record(test, status, subtest=subtest, duration=now - self._subtest_start,
+                     message=self._exc_info_to_string(err, test) if err is not None else None)
+        self._subtest_start = now
 
     def addSuccess(self, test):
         super().addSuccess(test)
-        print(f"{GREEN}✔ SUCCESS:{RESET} {self._short(test)}")
+        self._status = 'over budget' if self._over_budget() else 'success'
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._status = 'failure'
+        self._message = self._exc_info_to_string(err, test)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        if not hasattr(test, '_testMethodName'):  # setUpClass / setUpModule failure - no startTest / stopTest
+            self._budget = None
+            self._record(test, 'error', duration=0.0, message=self._exc_info_to_string(err, test))
+            return
+        self._status = 'timeout' if _is_timeout(err) or self._over_budget() else 'error'
+        self._message = self._exc_info_to_string(err, test)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._status = 'skipped'
+        self._message = reason
+
+
+class ColorizedResult(TimedResult):
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        if self._status == 'over budget':
+            print(f"{YELLOW}⏱ OVER BUDGET:{RESET} {self._short(test)} ({self._elapsed():.2f}s > {self._budget}s)")
+        else:
+            print(f"{GREEN}✔ SUCCESS:{RESET} {self._short(test)}")
 
     def addFailure(self, test, err):
         super().addFailure(test, err)
@@ -29,7 +188,10 @@ class ColorizedResult(unittest.TextTestResult):
 
     def addError(self, test, err):
         super().addError(test, err)
-        print(f"{RED}✘ ERROR:{RESET} {self._short(test)}")
+        if self._status == 'timeout':
+            print(f"{YELLOW}⏱ TIMEOUT:{RESET} {self._short(test)} ({self._elapsed():.2f}s, budget: {self._budget}s)")
+        else:
+            print(f"{RED}✘ ERROR:{RESET} {self._short(test)}")
 
 
 class SilentRunner(unittest.TextTestRunner):
@@ -38,3 +200,26 @@ class SilentRunner(unittest.TextTestRunner):
         kwargs["stream"] = SilentStream()  # silence unittest output
         super().__init__(*args, **kwargs)
         self.resultclass = ColorizedResult
+
+
+def slowest_report(count:int=10)->str:
+    """
+    Table of the slowest tests / subTests recorded in TEST_TIMINGS
+    """
+    timings = sorted(TEST_TIMINGS, key=lambda timing: timing['duration'], reverse=True)[:count]
+    if not timings:
+        return "No tests recorded"
+
+    rows = [['duration', 'budget', 'status', 'test']]
+    for timing in timings:
+        name = timing['test'] if not timing['subtest'] else f"{timing['test']} {timing['subtest']}"
+        rows.append([f"{timing['duration']:.3f}s", f"{timing['budget']}s" if timing['budget'] is not None else '-',
+                     timing['status'], name])
+    widths = [max(len(row[index]) for row in rows) for index in range(3)]
+
+    lines = [f"Top {len(timings)} slowest tests"]
+    for index, row in enumerate(rows):
+        lines.append("  ".join([row[column].ljust(widths[column]) for column in range(3)] + [row[3]]))
+        if index == 0:
+            lines.append("  ".join("-" * width for width in widths + [len(row[3])]))
+    return "\n".join(lines)
@@ -0,0 +1,123 @@
+"""
+Generated (seeded, reproducible) datasets for scale tests, and a batched ingest helper for them
+
+- high_cardinality_rows - power_plant like rows spread over a configurable number of distinct monitor ids
+- wide_rows - rows with a configurable number of (int / decimal / string) columns, and the column types AnyLog creates
+- ingest - send rows in JSON list batches through put_data, from a few concurrent connections per operator
+"""
+import concurrent.futures
+import datetime
+import itertools
+import json
+import random
+
+from source import tracing
+from source.rest_call import put_data, with_deadline
+
+START = datetime.datetime(2023, 1, 1)
+SECONDS = 3 * 365 * 24 * 3600  # generated timestamps fall within 3 years of START
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+
+def monitor_id(index:int)->str:
+    return f"M{index:07d}"
+
+
+def timestamp(offset:int)->str:
+    """
+    START + offset seconds as a data file timestamp
+    """
+    return (START + datetime.timedelta(seconds=offset)).strftime(TIMESTAMP_FORMAT)
+
+
+def high_cardinality_rows(cardinality:int, rows_per_id:int=2, seed:int=0):
+    """
+    Yield cardinality * rows_per_id rows - each monitor id appears rows_per_id times, at random (whole second)
+    timestamps. Every row carries its `_offset` (seconds since START) and `_id` (monitor index), which ingest drops.
+    """
+    generator = random.Random(seed)
+    for _ in range(rows_per_id):
+        for index in range(cardinality):
+            offset = generator.randrange(SECONDS)
+            yield {
+                '_id': index,
+                '_offset': offset,
+                'monitor_id': monitor_id(index),
+                'timestamp': timestamp(offset),
+                'a_current': generator.randrange(0, 100),
+                'b_current': generator.randrange(0, 100),
+                'c_current': generator.randrange(0, 100)
+            }
+
+
+def wide_column_types(columns:int)->dict:
+    """
+    Column name -> type the table is expected to get when wide_rows(columns) creates it (as in get columns)
+    """
+    types = {'timestamp': 'timestamp without time zone'}
+    for index in range(columns):
+        types[f"col_{index:04d}"] = ('int', 'decimal', 'char')[index % 3]
+    return types
+
+
+def wide_rows(columns:int, rows:int, seed:int=0, first:int=0):
+    """
+    Yield rows (numbered first ... first + rows - 1) with a timestamp and `columns` more columns - cycling int, decimal
+    and string values (see wide_column_types)
+    """
+    generator = random.Random(seed + first)
+    for number in range(first, first + rows):
+        row = {'timestamp': timestamp(number * 60)}
+        for index in range(columns):
+            kind = index % 3
+            if kind == 0:
+                row[f"col_{index:04d}"] = generator.randrange(0, 100000)
+            elif kind == 1:
+                row[f"col_{index:04d}"] = generator.randrange(0, 100000) + 0.5  # never integral - a short decimal, like rand_data's value
+            else:
+                row[f"col_{index:04d}"] = f"v{generator.randrange(0, 1000)}"
+        yield row
+
+
+def batches(rows, size:int):
+    """
+    Group an iterable of rows into lists of (up to) size rows
+    """
+    iterator = iter(rows)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def payload(batch:list)->str:
+    return json.dumps([{key: value for key, value in row.items() if not key.startswith('_')} for row in batch])
+
+
+def ingest(conns:list, db_name:str, table:str, rows, batch_size:int=1000, connections:int=2, on_batch=None)->int:
+    """
+    Insert rows (an iterable of dicts) in batches, `connections` concurrent PUTs per operator - on_batch(batch) is
+    called for every batch before it is sent (ex. to compute expected results). Keys starting with _ are not sent.
+    :return:
+        number of rows sent
+    """
+    sent = 0
+    workers = max(1, connections * len(conns))
+    conn_cycle = itertools.cycle(conns)
+    send = with_deadline(put_data)  # PUTs run under the deadline of the calling thread (ex. a test's budget)
+    with tracing.span(f"ingest {table}", category='ingest', batch_size=batch_size):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for batch in batches(rows, batch_size):
+                if on_batch:
+                    on_batch(batch)
+                pending.add(executor.submit(send, conn=next(conn_cycle), payload=payload(batch), dbms=db_name, table=table))
+                sent += len(batch)
+                if len(pending) >= workers * 2:  # bound the number of serialized batches held in memory
+                    done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+            for future in concurrent.futures.as_completed(pending):
+                future.result()
+    return sent
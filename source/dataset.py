@@ -0,0 +1,672 @@
+"""
+Columnar, array-backed model of the data files (data/data.[table_name].*.json)
+
+Rows are loaded into one typed array per column rather than a list of per-row dicts:
+- int / float / bool values -> array('q') / array('d') / array('b')
+- timestamp                 -> array('q') of epoch microseconds (UTC) - rows are rebuilt with the column's text format,
+                               the original text is only kept for the (few) values that do not round-trip through it
+- strings (ex. monitor_id, acct) -> array('i') of codes into a shared dictionary of distinct values
+- mixed types / nested values -> 'object' column - array('i') of codes into a dictionary of the values' JSON text
+A missing key or JSON null is tracked in a per-column validity bytearray, and the key order of each row in a per-row
+layout code, so rebuilt rows (`row`, `serialize`) match the data file lines.
+
+Slicing (`ColumnarTable.slice`, `ColumnarTable.batches`) returns memoryviews over the same buffers, so batches for the
+sender or local analysis do not copy data.
+
+Parsed files are cached in a binary columnar format (cache/[file name].[sha256 prefix].bin) - the raw column buffers
+behind a JSON header - and memory-mapped on load, so repeated runs skip JSON parsing while the source file is unchanged.
+    python3 -m source.dataset [--data-dir DATA_DIR] [--cache-dir CACHE_DIR] [--refresh]
+"""
+import argparse
+import array
+import datetime
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+
+ROOT_DIR = os.path.dirname(__file__).rsplit('source', 1)[0]
+DATA_DIR = os.path.join(ROOT_DIR, 'data')
+CACHE_DIR = os.path.join(ROOT_DIR, 'cache')
+CACHE_MAGIC = b"EDGECASE-COLUMNAR-4\n"
+USE_CACHE = True  # load full data files from / save them to CACHE_DIR
+
+TIMESTAMP_COLUMN = 'timestamp'
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+TIMESTAMP_FORMATS = (TIMESTAMP_FORMAT, '%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%d %H:%M:%S',
+                     '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S')  # formats a timestamp column's text is rebuilt with
+EPOCH = datetime.datetime(1970, 1, 1)
+ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
+TYPECODES = {
+    'int': 'q',
+    'float': 'd',
+    'bool': 'b',
+    'timestamp': 'q',
+    'string': 'i',
+    'object': 'i'
+}
+
+
+def timestamp_to_micros(value:str)->int:
+    """
+    Convert a timestamp string (ex. 2023-01-01T00:00:00.000000Z or 2025-11-16 12:20:43.058968) into epoch microseconds
+    """
+    if value.endswith('Z'):
+        value = value[:-1]
+    timestamp = datetime.datetime.fromisoformat(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // ONE_MICROSECOND
+
+
+def micros_to_timestamp(value:int, timestamp_format:str=TIMESTAMP_FORMAT)->str:
+    return (EPOCH + datetime.timedelta(microseconds=value)).strftime(timestamp_format)
+
+
+class Column:
+    """
+    A single typed column - `values` and `valid` are either arrays (owned) or memoryviews (slices of another column)
+    """
+    def __init__(self, name:str, kind:str, values, valid, dictionary:list=None, timestamp_format:str=None,
+                 overrides:dict=None):
+        self.name = name
+        self.kind = kind
+        self.values = values
+        self.valid = valid
+        self.dictionary = dictionary
+        # timestamp columns - text is rebuilt from the micros with timestamp_format, except for the rows in overrides
+        # (row index -> original text) whose text doesn't round-trip (ex. offsets, other formats, unparseable values)
+        self.timestamp_format = timestamp_format
+        self.overrides = overrides
+
+    def __len__(self):
+        return len(self.values)
+
+    def value(self, index:int):
+        """
+        Python value at index (None if missing), as it appears in the data file
+        """
+        if self.kind == 'timestamp' and self.overrides and index in self.overrides:
+            return self.overrides[index]
+        if not self.valid[index]:
+            return None
+        value = self.values[index]
+        if self.kind == 'timestamp':
+            return micros_to_timestamp(value, self.timestamp_format or TIMESTAMP_FORMAT)
+        if self.kind == 'string':
+            return self.dictionary[value]
+        if self.kind == 'object':
+            return json.loads(self.dictionary[value])
+        if self.kind == 'bool':
+            return bool(value)
+        return value
+
+    def slice(self, start:int, stop:int):
+        overrides = self.overrides
+        if overrides:
+            start, stop, _ = slice(start, stop).indices(len(self.values))
+            overrides = {index - start: text for index, text in overrides.items() if start <= index < stop}
+        return Column(name=self.name, kind=self.kind, values=memoryview(self.values)[start:stop],
+                      valid=memoryview(self.valid)[start:stop], dictionary=self.dictionary,
+                      timestamp_format=self.timestamp_format, overrides=overrides)
+
+    def take(self, indices:list):
+        overrides = self.overrides
+        if overrides:
+            overrides = {position: overrides[index] for position, index in enumerate(indices) if index in overrides}
+        return Column(name=self.name, kind=self.kind, values=array.array(TYPECODES[self.kind], (self.values[i] for i in indices)),
+                      valid=bytearray(self.valid[i] for i in indices), dictionary=self.dictionary,
+                      timestamp_format=self.timestamp_format, overrides=overrides)
+
+    def nbytes(self)->int:
+        overrides = sum(len(text) for text in self.overrides.values()) if self.overrides else 0
+        return len(self.values) * array.array(TYPECODES[self.kind]).itemsize + len(self.valid) + overrides
+
+
+class _ColumnBuilder:
+    """
+    Accumulate the values of a single column, inferring the column type as rows come in - a column whose values do
+    not share one type (or holds objects / lists) becomes an 'object' column
+    """
+    def __init__(self, name:str, offset:int=0):
+        self.name = name
+        self.kind = None
+        self.values = None
+        self.valid = bytearray(offset)
+        self.dictionary = None
+        self.codes = None
+        self.timestamp_format = None
+        self.overrides = None
+        self.pending = offset  # rows seen before the column had a type
+
+    def _set_kind(self, kind:str):
+        self.kind = kind
+        self.values = array.array(TYPECODES[kind], bytes(array.array(TYPECODES[kind]).itemsize * self.pending))
+        if kind in ('string', 'object'):
+            self.dictionary = []
+            self.codes = {}
+        if kind == 'timestamp':
+            self.overrides = {}
+
+    def _code(self, value:str)->int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.dictionary)
+            self.dictionary.append(value)
+        return code
+
+    def _to_object(self):
+        """
+        Re-encode the values seen so far as an 'object' column
+        """
+        column = Column(name=self.name, kind=self.kind, values=self.values, valid=self.valid,
+                        dictionary=self.dictionary, timestamp_format=self.timestamp_format, overrides=self.overrides)
+        previous = [column.value(index) for index in range(len(self.valid))]
+        self.pending = 0
+        self.valid = bytearray()
+        self.timestamp_format = None
+        self.overrides = None
+        self._set_kind('object')
+        for value in previous:
+            if value is None:
+                self.append_missing()
+            else:
+                self.append(value)
+
+    def append(self, value):
+        if value is None:
+            self.append_missing()
+            return
+
+        if isinstance(value, bool):
+            kind = 'bool'
+        elif isinstance(value, int):
+            kind = 'int'
+        elif isinstance(value, float):
+            kind = 'float'
+        elif isinstance(value, str):
+            kind = 'timestamp' if self.name == TIMESTAMP_COLUMN else 'string'
+        else:
+            kind = 'object'
+
+        if self.kind is None:
+            self._set_kind(kind)
+        elif kind != self.kind and self.kind != 'object':
+            self._to_object()
+
+        if self.kind == 'object':
+            self.values.append(self._code(json.dumps(value)))
+        elif self.kind == 'string':
+            self.values.append(self._code(value))
+        elif self.kind == 'timestamp':
+            try:
+                micros = timestamp_to_micros(value)
+            except ValueError:
+                self.overrides[len(self.valid)] = value  # kept as text only - not a valid timestamp for local analysis
+                self.values.append(0)
+                self.valid.append(0)
+                return
+            if self.timestamp_format is None:
+                self.timestamp_format = next((timestamp_format for timestamp_format in TIMESTAMP_FORMATS
+                                              if micros_to_timestamp(micros, timestamp_format) == value), TIMESTAMP_FORMAT)
+            if micros_to_timestamp(micros, self.timestamp_format) != value:
+                self.overrides[len(self.valid)] = value
+            self.values.append(micros)
+        else:
+            self.values.append(value)
+        self.valid.append(1)
+
+    def append_missing(self):
+        if self.kind is None:
+            self.pending += 1
+        else:
+            self.values.append(0)
+        self.valid.append(0)
+
+    def build(self)->Column:
+        if self.kind is None:  # column only ever had nulls
+            self._set_kind('string')
+        return Column(name=self.name, kind=self.kind, values=self.values, valid=self.valid, dictionary=self.dictionary,
+                      timestamp_format=self.timestamp_format, overrides=self.overrides)
+
+
+class ColumnarTable:
+    def __init__(self, name:str, columns:dict, length:int, layouts:list=None, layout=None):
+        self.name = name
+        self.columns = columns  # column name -> Column (in first-seen order)
+        self.length = length
+        self.layouts = layouts  # distinct key orders (tuples of column names) of the rows
+        self.layout = layout  # per row - index into layouts (None - rows hold their valid columns, in column order)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column:str)->Column:
+        return self.columns[column]
+
+    @property
+    def column_names(self)->list:
+        return list(self.columns)
+
+    def row(self, index:int)->dict:
+        """
+        The row as it appears in the data file - same keys (JSON nulls included), in the same order
+        """
+        if self.layout is None:
+            row = {}
+            for name, column in self.columns.items():
+                value = column.value(index)
+                if value is not None:
+                    row[name] = value
+            return row
+        return {name: self.columns[name].value(index) for name in self.layouts[self.layout[index]]}
+
+    def rows(self):
+        for index in range(self.length):
+            yield self.row(index)
+
+    def slice(self, start:int, stop:int=None):
+        """
+        Zero-copy view of rows [start, stop)
+        """
+        start, stop, _ = slice(start, stop).indices(self.length)
+        stop = max(start, stop)
+        return ColumnarTable(name=self.name, length=stop - start,
+                             columns={name: column.slice(start, stop) for name, column in self.columns.items()},
+                             layouts=self.layouts,
+                             layout=memoryview(self.layout)[start:stop] if self.layout is not None else None)
+
+    def batches(self, size:int):
+        """
+        Yield zero-copy views of (up to) size rows each
+        """
+        size = max(1, size)
+        for start in range(0, self.length, size):
+            yield self.slice(start, start + size)
+
+    def take(self, indices:list):
+        return ColumnarTable(name=self.name, length=len(indices),
+                             columns={name: column.take(indices) for name, column in self.columns.items()},
+                             layouts=self.layouts,
+                             layout=array.array('i', (self.layout[i] for i in indices)) if self.layout is not None else None)
+
+    def sort_by(self, column:str=TIMESTAMP_COLUMN):
+        """
+        Copy of the table sorted (stable) by a column - missing values sort first
+        """
+        values = self.columns[column].values
+        return self.take(sorted(range(self.length), key=values.__getitem__))
+
+    def serialize_rows(self):
+        """
+        Yield each row as a JSON string
+        """
+        for row in self.rows():
+            yield json.dumps(row)
+
+    def serialize(self)->str:
+        """
+        All rows as a single JSON list
+        """
+        return json.dumps(list(self.rows()))
+
+    def nbytes(self)->int:
+        layout = len(self.layout) * array.array('i').itemsize if self.layout is not None else 0
+        return sum(column.nbytes() for column in self.columns.values()) + layout + \
+            sum(len(value) for column in self.columns.values() if column.dictionary for value in column.dictionary)
+
+
+def load_lines(lines, table_name:str=None, source:str=None)->ColumnarTable:
+    """
+    Build a table from line-delimited JSON (str or bytes lines, with optional trailing commas)
+    """
+    builders = {}
+    layouts = {}
+    layout = array.array('i')
+    length = 0
+    for line in lines:
+        line = line.strip()
+        line = line.rstrip(b"," if isinstance(line, bytes) else ",")
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except Exception as error:
+            raise Exception(f"Failed to read content from {source} (line: {line} | Error: {error})")
+
+        for key, value in row.items():
+            if key not in builders:
+                builders[key] = _ColumnBuilder(name=key, offset=length)
+            builders[key].append(value)
+        layout.append(layouts.setdefault(tuple(row), len(layouts)))
+        length += 1
+        for builder in builders.values():
+            if len(builder.valid) < length:
+                builder.append_missing()
+
+    return ColumnarTable(name=table_name, length=length,
+                         columns={name: builder.build() for name, builder in builders.items()},
+                         layouts=list(layouts), layout=layout)
+
+
+def table_name(file_path:str)->str:
+    """
+    data.[table_name].0.0.json -> table_name
+    """
+    return os.path.basename(file_path).split(".")[1]
+
+
+def _parse_file(file_path:str, start:int=0, end:int=None)->ColumnarTable:
+    try:
+        with open(file_path, "rb") as f:
+            f.seek(start)
+            content = f.read() if end is None else f.read(end - start)
+    except Exception as error:
+        raise Exception(f"Failed to read content from {file_path} (Error: {error})")
+    return load_lines(content.split(b"\n"), table_name=table_name(file_path), source=file_path)
+
+
+_HASHES = {}
+_HASHES_LOCK = threading.Lock()
+
+
+def file_hash(file_path:str)->str:
+    """
+    sha256 of a file's content - memoized per (path, size, mtime) within the process
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _HASHES_LOCK:
+        if key in _HASHES:
+            return _HASHES[key]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    with _HASHES_LOCK:
+        _HASHES[key] = digest.hexdigest()
+    return _HASHES[key]
+
+
+def cache_path(file_path:str, cache_dir:str=CACHE_DIR)->str:
+    return os.path.join(cache_dir, f"{os.path.basename(file_path)}.{file_hash(file_path)[:16]}.bin")
+
+
+def fresh_cache(file_path:str, cache_dir:str=CACHE_DIR)->str:
+    """
+    Path of the cache for the current content of file_path, or None if it has not been built (in the current format)
+    """
+    path = cache_path(file_path, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            return path if f.read(len(CACHE_MAGIC)) == CACHE_MAGIC else None
+    except OSError:
+        return None
+
+
+def _align(offset:int)->int:
+    return (offset + 7) // 8 * 8
+
+
+def write_cache(table:ColumnarTable, path:str, source_hash:str=None):
+    """
+    Store a table as: magic | row count | header length (8 bytes each, little endian) | JSON header | 8-byte aligned
+    buffers (row layout codes, then each column's values and validity). The row layouts and the timestamp formats /
+    overrides are kept in the header.
+    """
+    header = {'table': table.name, 'length': table.length, 'sha256': source_hash, 'byteorder': sys.byteorder,
+              'columns': [], 'layouts': None, 'layout': None}
+    buffers = []
+    offset = 0
+    if table.layout is not None:
+        layout = memoryview(array.array('i', table.layout)).cast('B')
+        header['layouts'] = [list(layout_names) for layout_names in table.layouts]
+        header['layout'] = offset
+        buffers.append((offset, layout))
+        offset = _align(offset + layout.nbytes)
+    for column in table.columns.values():
+        values = memoryview(column.values).cast('B')
+        valid = memoryview(column.valid).cast('B')
+        header['columns'].append({'name': column.name, 'kind': column.kind, 'dictionary': column.dictionary,
+                                  'timestamp_format': column.timestamp_format,
+                                  'overrides': {str(index): text for index, text in column.overrides.items()}
+                                  if column.overrides is not None else None,
+                                  'values': offset, 'valid': _align(offset + values.nbytes)})
+        buffers.append((offset, values))
+        offset = _align(offset + values.nbytes)
+        buffers.append((offset, valid))
+        offset = _align(offset + valid.nbytes)
+
+    header = json.dumps(header).encode()
+    base = _align(len(CACHE_MAGIC) + 16 + len(header))
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_MAGIC + table.length.to_bytes(8, 'little') + len(header).to_bytes(8, 'little') + header)
+            for position, buffer in buffers:
+                f.seek(base + position)
+                f.write(buffer)
+            f.truncate(base + offset)
+        os.replace(tmp_path, path)
+    except Exception as error:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+        raise Exception(f"Failed to write dataset cache {path} (Error: {error})")
+
+
+def cache_length(path:str)->int:
+    """
+    Row count of a cache file - read from its fixed size prefix only (the header is not parsed)
+    """
+    try:
+        with open(path, "rb") as f:
+            prefix = f.read(len(CACHE_MAGIC) + 8)
+        if prefix[:len(CACHE_MAGIC)] != CACHE_MAGIC or len(prefix) != len(CACHE_MAGIC) + 8:
+            raise ValueError("invalid file format")
+    except Exception as error:
+        raise Exception(f"Failed to read dataset cache {path} (Error: {error})")
+    return int.from_bytes(prefix[len(CACHE_MAGIC):], 'little')
+
+
+def read_cache(path:str, start:int=0, stop:int=None)->ColumnarTable:
+    """
+    Memory-map a cache file - columns are read-only memoryviews over the mapping (no copy). With start / stop only
+    that range of rows is returned (ex. a shard read by a worker process).
+    """
+    try:
+        with open(path, "rb") as f:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if content[:len(CACHE_MAGIC)] != CACHE_MAGIC:
+            raise ValueError("invalid file format")
+        header_start = len(CACHE_MAGIC) + 16
+        header_length = int.from_bytes(content[len(CACHE_MAGIC) + 8:header_start], 'little')
+        header = json.loads(content[header_start:header_start + header_length])
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f"cache written on a {header['byteorder']} endian machine")
+    except Exception as error:
+        raise Exception(f"Failed to read dataset cache {path} (Error: {error})")
+
+    buffer = memoryview(content)
+    base = _align(header_start + header_length)
+    length = header['length']
+    columns = {}
+    for column in header['columns']:
+        typecode = TYPECODES[column['kind']]
+        values_start = base + column['values']
+        values_end = values_start + length * array.array(typecode).itemsize
+        valid_start = base + column['valid']
+        columns[column['name']] = Column(name=column['name'], kind=column['kind'],
+                                         values=buffer[values_start:values_end].cast(typecode),
+                                         valid=buffer[valid_start:valid_start + length],
+                                         dictionary=column['dictionary'], timestamp_format=column['timestamp_format'],
+                                         overrides={int(index): text for index, text in column['overrides'].items()}
+                                         if column['overrides'] is not None else None)
+    layouts = None
+    layout = None
+    if header['layouts'] is not None:
+        layouts = [tuple(layout_names) for layout_names in header['layouts']]
+        layout_start = base + header['layout']
+        layout = buffer[layout_start:layout_start + length * array.array('i').itemsize].cast('i')
+    table = ColumnarTable(name=header['table'], columns=columns, length=length, layouts=layouts, layout=layout)
+    return table.slice(start, stop) if start or stop is not None else table
+
+
+def build_cache(file_path:str, cache_dir:str=CACHE_DIR)->ColumnarTable:
+    """
+    Parse file_path, store it in the cache (removing caches of older versions of the file) and return the table
+    """
+    table = _parse_file(file_path)
+    path = cache_path(file_path, cache_dir)
+    write_cache(table, path, source_hash=file_hash(file_path))
+
+    prefix = f"{os.path.basename(file_path)}."
+    for fname in os.listdir(cache_dir):
+        if fname.startswith(prefix) and fname.endswith(".bin") and os.path.join(cache_dir, fname) != path:
+            try:
+                os.remove(os.path.join(cache_dir, fname))
+            except OSError:
+                pass
+    return table
+
+
+def load_file(file_path:str, start:int=0, end:int=None, use_cache:bool=None)->ColumnarTable:
+    """
+    Load a data file (or the byte range [start, end) of it - which must be on line boundaries). A full file is read
+    from its cache when fresh, otherwise parsed and cached.
+    """
+    if use_cache is None:
+        use_cache = USE_CACHE
+    if not use_cache or start or end is not None:
+        return _parse_file(file_path, start, end)
+
+    path = fresh_cache(file_path)
+    if path:
+        try:
+            return read_cache(path)
+        except Exception as error:
+            print(f"Rebuilding dataset cache for {file_path} ({error})")
+    try:
+        return build_cache(file_path)
+    except Exception as error:
+        print(f"Failed to cache {file_path} ({error})")
+        return _parse_file(file_path)
+
+
+def concat(tables:list)->ColumnarTable:
+    """
+    Combine tables with the same name into one (copies) - a column whose kind differs between the tables becomes an
+    'object' column
+    """
+    if len(tables) == 1:
+        return tables[0]
+
+    names = []
+    for table in tables:
+        names += [name for name in table.columns if name not in names]
+
+    columns = {}
+    for name in names:
+        kinds = {table.columns[name].kind for table in tables if name in table.columns}
+        if len(kinds) > 1:
+            builder = _ColumnBuilder(name=name)
+            builder._set_kind('object')
+            for table in tables:
+                column = table.columns.get(name)
+                for index in range(table.length):
+                    builder.append(column.value(index) if column is not None else None)
+            columns[name] = builder.build()
+            continue
+
+        kind = kinds.pop()
+        values = array.array(TYPECODES[kind])
+        valid = bytearray()
+        dictionary = [] if kind in ('string', 'object') else None
+        timestamp_format = None
+        overrides = None
+        if kind == 'timestamp':
+            timestamp_format = next((table.columns[name].timestamp_format for table in tables
+                                     if name in table.columns and table.columns[name].timestamp_format), None)
+            overrides = {}
+        codes = {}
+        for table in tables:
+            column = table.columns.get(name)
+            if column is None:
+                values.extend(array.array(TYPECODES[kind], bytes(values.itemsize * table.length)))
+                valid.extend(bytes(table.length))
+                continue
+            if dictionary is not None:
+                remap = [codes.setdefault(value, len(codes)) for value in column.dictionary]
+                values.extend(remap[code] if code < len(remap) else 0 for code in column.values)
+            else:
+                values.extend(column.values)
+            valid.extend(column.valid)
+            if overrides is not None:
+                offset = len(valid) - len(column)
+                if column.timestamp_format in (None, timestamp_format):
+                    overrides.update((offset + index, text) for index, text in (column.overrides or {}).items())
+                else:  # rebuilt with another format - keep the text of the rows it does not round-trip for
+                    for index in range(len(column)):
+                        text = column.value(index)
+                        if text is not None and (not column.valid[index] or
+                                                 text != micros_to_timestamp(column.values[index], timestamp_format)):
+                            overrides[offset + index] = text
+        if dictionary is not None:
+            dictionary.extend(codes)
+        columns[name] = Column(name=name, kind=kind, values=values, valid=valid, dictionary=dictionary,
+                               timestamp_format=timestamp_format, overrides=overrides)
+
+    layouts = None
+    layout = None
+    if all(table.layout is not None for table in tables):
+        positions = {}
+        layout = array.array('i')
+        for table in tables:
+            remap = [positions.setdefault(layout_names, len(positions)) for layout_names in table.layouts]
+            layout.extend(remap[code] for code in table.layout)
+        layouts = list(positions)
+
+    return ColumnarTable(name=tables[0].name, length=sum(table.length for table in tables), columns=columns,
+                         layouts=layouts, layout=layout)
+
+
+def data_files(data_dir:str=DATA_DIR)->dict:
+    """
+    table name -> list of data files for that table
+    """
+    files = {}
+    for fname in sorted(os.listdir(data_dir)):
+        if fname.startswith("data.") and fname.endswith(".json"):
+            files.setdefault(table_name(fname), []).append(os.path.join(data_dir, fname))
+    return files
+
+
+def load_table(table:str, data_dir:str=DATA_DIR)->ColumnarTable:
+    """
+    Load every data/data.[table].*.json file as a single table
+    """
+    files = data_files(data_dir).get(table)
+    if not files:
+        raise FileNotFoundError(f"No data files found for table {table} in {data_dir}")
+    return concat([load_file(file_path) for file_path in files])
+
+
+if __name__ == '__main__':
+    parse = argparse.ArgumentParser(description="Convert data files into the binary columnar cache")
+    parse.add_argument('--data-dir', type=str, default=DATA_DIR, help='directory with data.[table_name].*.json files')
+    parse.add_argument('--cache-dir', type=str, default=CACHE_DIR, help='directory to store cache files in')
+    parse.add_argument('--refresh', type=bool, nargs='?', const=True, default=False, help='rebuild caches that are still fresh')
+    args = parse.parse_args()
+
+    for table, files in data_files(args.data_dir).items():
+        for file_path in files:
+            if args.refresh or not fresh_cache(file_path, args.cache_dir):
+                converted = build_cache(file_path, args.cache_dir)
+                print(f"{file_path} -> {cache_path(file_path, args.cache_dir)} ({len(converted)} rows)")
+            else:
+                print(f"{file_path} - cache is up to date")
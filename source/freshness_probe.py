@@ -0,0 +1,131 @@
+"""
+End-to-end freshness - how long it takes a row from the PUT to an operator until it is returned by the query node
+
+Uniquely tagged marker rows are inserted (through put_data) into a probe table at a steady rate, while the query node
+is polled for them. The freshness of a marker is the time from the start of its PUT until the first poll returning it
+(so it is accurate to about POLL_INTERVAL). The probe runs without and with an explicit `flush buffers` after each PUT.
+
+Every probe inserts into the same table (PROBE_TABLE) - its markers are told apart by their probe_id - so a single
+table policy is ever added to the blockchain. The operators' local table is dropped once a probe completes, so marker
+rows do not pile up across runs.
+"""
+import datetime
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from source import tracing
+from source.metrics import BUCKETS, percentile
+from source.rest_call import drop_table, flush_buffer, get_data, put_data
+
+PROBE_TABLE = 'freshness_probe'
+POLL_INTERVAL = 0.1
+TIMEOUT = 60  # seconds to wait for the markers after the last PUT
+
+
+def _poll(query_conn:str, db_name:str, probe_id:str)->list:
+    query = (f"sql {db_name} format=json and stat=false SELECT seq FROM {PROBE_TABLE} "
+             f"WHERE probe_id = '{probe_id}'")
+    try:
+        return [row['seq'] for row in get_data(conn=query_conn, query=query).json().get('Query', [])]
+    except Exception:
+        return []  # table not created yet / no rows
+
+
+def run_probe(query_conn:str, operators:list, db_name:str, markers:int=20, rate:float=2.0, flush:bool=False,
+              timeout:float=TIMEOUT)->dict:
+    """
+    Insert `markers` marker rows at `rate` rows/sec and measure the freshness latency of each
+    """
+    probe_id = uuid.uuid4().hex
+    sent = {}
+    seen = {}
+    done = threading.Event()
+    errors = []
+
+    def _sender():
+        conns = itertools.cycle(operators)
+        next_time = time.perf_counter()
+        for seq in range(markers):
+            conn = next(conns)
+            row = {'timestamp': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S.%f'),
+                   'probe_id': probe_id, 'seq': seq}
+            sent[seq] = time.perf_counter()
+            try:
+                put_data(conn=conn, payload=json.dumps(row), dbms=db_name, table=PROBE_TABLE)
+                if flush:
+                    flush_buffer(conn=conn, wait=0)
+            except Exception as error:
+                errors.append(str(error))
+            next_time += 1 / rate
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+        done.set()
+
+    mode = 'flush' if flush else 'no flush'
+    with tracing.span(f"freshness probe ({mode})", category='phase', markers=markers, rate=rate):
+        sender = threading.Thread(target=_sender, name='freshness-sender')
+        sender.start()
+        deadline = None
+        while len(seen) < markers:
+            now = time.perf_counter()
+            if done.is_set():
+                deadline = deadline or now + timeout
+                if now > deadline:
+                    break
+            visible = _poll(query_conn, db_name, probe_id)
+            received = time.perf_counter()
+            for seq in visible:
+                if seq in sent and seq not in seen:
+                    seen[seq] = received - sent[seq]
+            time.sleep(POLL_INTERVAL)
+        sender.join()
+
+    try:
+        drop_table(conn=operators, dbms=db_name, table=PROBE_TABLE)
+    except Exception as error:
+        print(f"Failed to drop {db_name}.{PROBE_TABLE} ({error})")
+
+    latencies = list(seen.values())
+    return {
+        'mode': mode,
+        'markers': markers,
+        'visible': len(latencies),
+        'errors': errors,
+        'latencies': latencies,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies) if latencies else None
+    }
+
+
+def _seconds(value)->str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+def report(results:list)->str:
+    """
+    Freshness latency (p50 / p99 / max and a histogram) per mode
+    """
+    bounds = [bound for bound in BUCKETS if bound >= 0.1]
+    header = ['mode', 'markers', 'visible', 'p50 s', 'p99 s', 'max s'] + \
+             [f">={BUCKETS[-2]:g}s" if bound == float('inf') else f"<{bound:g}s" for bound in bounds]
+    rows = []
+    for result in results:
+        buckets = [0] * len(bounds)
+        for latency in result['latencies']:
+            buckets[next(index for index, bound in enumerate(bounds) if latency < bound)] += 1
+        rows.append([result['mode'], str(result['markers']), str(result['visible']), _seconds(result['p50']),
+                     _seconds(result['p99']), _seconds(result['max'])] + [str(count) for count in buckets])
+
+    widths = [max(len(row[index]) for row in rows + [header]) for index in range(len(header))]
+    lines = ["Ingest-to-query freshness"]
+    lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(header)))
+    lines.append("  ".join("-" * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(row)))
+    for result in results:
+        if result['errors']:
+            lines.append(f"{result['mode']} - {len(result['errors'])} failed PUTs (first: {result['errors'][0]})")
+    return "\n".join(lines)
@@ -0,0 +1,161 @@
+"""
+Skip re-inserting tables that are already loaded
+
+Each table's data files are fingerprinted - sha256 of the files, row count and min / max timestamp. Before inserting,
+the fingerprint is compared with `count(*), min(timestamp), max(timestamp)` of the table in the target database:
+- the table is not declared (no table policy) or is empty -> it is sent
+- the counts and timestamps match -> it is skipped
+- they differ, or the files changed since they were last sent (their hash differs from the one recorded) -> it is
+  skipped and reported, as sending it again would add the files on top of the rows already there (--force-insert
+  sends it)
+- the table can't be queried (ex. the query node times out) -> it is skipped and reported
+
+The fingerprint of every table sent without error is recorded (per query node / database) in cache/ingested.json - a
+table whose insert failed is compared with the database again on the next run.
+"""
+import json
+import os
+import threading
+
+from source import dataset
+from source import support
+from source.rest_call import get_data
+
+RECORD_FILE = os.path.join(dataset.CACHE_DIR, 'ingested.json')
+_LOCK = threading.Lock()
+
+
+def local_fingerprint(files:list)->dict:
+    """
+    Fingerprint of a table's data files - None timestamps when the files hold no (valid) timestamp
+    """
+    rows = 0
+    min_ts = None
+    max_ts = None
+    for file_path in files:
+        table = dataset.load_file(file_path)
+        rows += len(table)
+        if dataset.TIMESTAMP_COLUMN in table.column_names:
+            column = table[dataset.TIMESTAMP_COLUMN]
+            values = [column.values[index] for index in range(len(column)) if column.valid[index]]
+            if values:
+                min_ts = min(values) if min_ts is None else min(min_ts, min(values))
+                max_ts = max(values) if max_ts is None else max(max_ts, max(values))
+    return {
+        'hash': [dataset.file_hash(file_path) for file_path in sorted(files)],
+        'rows': rows,
+        'min_ts': min_ts,
+        'max_ts': max_ts
+    }
+
+
+def _table_declared(conn:str, db_name:str, table:str)->bool:
+    """
+    Whether the table has a table policy in the blockchain (the table was created by an earlier insert)
+    """
+    command = f"blockchain get table where dbms={db_name} and name={table}"
+    try:
+        response = get_data(conn, command, destination="")
+        return bool(response.text.strip()) and bool(response.json())
+    except Exception as error:
+        raise Exception(f"Failed to look up the table policy of {db_name}.{table} (Error: {error})")
+
+
+def declared_tables(conn:str, db_name:str)->set:
+    """
+    Names of the tables with a table policy in the database
+    """
+    command = f"blockchain get table where dbms={db_name}"
+    try:
+        response = get_data(conn, command, destination="")
+        policies = response.json() if response.text.strip() else []
+    except Exception as error:
+        raise Exception(f"Failed to look up the table policies of {db_name} (Error: {error})")
+    return {policy['table']['name'] for policy in policies or []}
+
+
+def remote_row_count(conn:str, db_name:str, table:str)->int:
+    """
+    Rows in the table - 0 when the table is not declared, raises when a declared table can't be queried
+    """
+    if not _table_declared(conn, db_name, table):
+        return 0
+    query = f'sql {db_name} format=json and stat=false "SELECT COUNT(*) AS row_count FROM {table}"'
+    try:
+        return get_data(conn, query).json()['Query'][0]['row_count'] or 0
+    except Exception as error:
+        raise Exception(f"Failed to query {db_name}.{table} (Error: {error})")
+
+
+def remote_fingerprint(conn:str, db_name:str, table:str)->dict:
+    """
+    Row count and min / max timestamp of the table in the database - None when the table is not declared. Raises when
+    a declared table can't be queried, so a failed query (ex. a timeout) is never mistaken for a missing table.
+    """
+    if not _table_declared(conn, db_name, table):
+        return None
+    query = (f'sql {db_name} format=json and stat=false and timezone=utc "SELECT COUNT(*) AS row_count, '
+             f'MIN(timestamp) AS min_ts, MAX(timestamp) AS max_ts FROM {table}"')
+    try:
+        row = get_data(conn, query).json()['Query'][0]
+    except Exception as error:
+        raise Exception(f"Failed to query {db_name}.{table} (Error: {error})")
+    return {
+        'rows': row.get('row_count') or 0,
+        'min_ts': dataset.timestamp_to_micros(row['min_ts']) if row.get('min_ts') else None,
+        'max_ts': dataset.timestamp_to_micros(row['max_ts']) if row.get('max_ts') else None
+    }
+
+
+def _read_record()->dict:
+    try:
+        with open(RECORD_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _key(conn:str, db_name:str, table:str)->str:
+    return f"{conn}/{db_name}.{table}"
+
+
+def record(conn:str, db_name:str, fingerprints:dict):
+    """
+    Remember the fingerprints ({table: fingerprint}) of the tables sent
+    """
+    with _LOCK:
+        content = _read_record()
+        for table, fingerprint in fingerprints.items():
+            content[_key(conn, db_name, table)] = fingerprint
+        support.create_dir(os.path.dirname(RECORD_FILE))
+        support.write_file(RECORD_FILE, json.dumps(content, indent=2))
+
+
+def tables_to_insert(conn:str, db_name:str, files:dict)->tuple:
+    """
+    Compare every table's files ({table: [file paths]}) with the database
+    :return:
+        ({table: fingerprint} to send, {table: reason} skipped)
+    """
+    recorded = _read_record()
+    send = {}
+    skipped = {}
+    for table, table_files in files.items():
+        local = local_fingerprint(table_files)
+        try:
+            remote = remote_fingerprint(conn, db_name, table)
+        except Exception as error:
+            skipped[table] = f"can't compare it with {db_name} - {error}"
+            continue
+        previous = recorded.get(_key(conn, db_name, table))
+        changed = previous is not None and previous.get('hash') != local['hash']
+
+        if not remote or not remote['rows']:
+            send[table] = local
+        elif changed:
+            skipped[table] = f"files changed since they were sent, {remote['rows']} rows already in {db_name}"
+        elif all(remote[key] == local[key] for key in ('rows', 'min_ts', 'max_ts')):
+            skipped[table] = f"{local['rows']} rows already in {db_name}"
+        else:
+            skipped[table] = f"{remote['rows']} rows in {db_name} do not match the {local['rows']} rows of the files"
+    return send, skipped
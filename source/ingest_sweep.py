@@ -0,0 +1,212 @@
+"""
+Ingest scaling sweep - repeatedly insert a fixed dataset into a scratch database over a grid of
+    operators (how many of the given operators receive data) x connections per operator x rows per request
+and report the rows/sec of each configuration.
+
+Every cell inserts into a scratch table ([table]_sweep), flushes the operators' buffers (without the fixed flush wait)
+and polls the query node until it returns the full row count. The table is dropped from the operators before and after
+each cell, so cells - and repeated sweeps - start from an empty table. Payloads are serialized before the clock starts,
+so only sending is measured.
+
+The sweep is not part of edgecase_suite.py - run it as a module from the repository root (so `source` is importable):
+    python3 -m source.ingest_sweep --query 10.0.0.1:32349 --operator 10.0.0.2:32149,10.0.0.3:32149 --db-name sweep_test
+"""
+import argparse
+import itertools
+import threading
+import time
+
+from source import dataset
+from source import rest_call
+from source.query_scaling import concurrency_levels
+from source import tracing
+from source.rest_call import drop_table, flush_buffer, get_data, put_data
+
+VERIFY_TIMEOUT = 120  # seconds to wait for a cell's rows to be queryable
+VERIFY_INTERVAL = 1
+
+
+def _payloads(table:dataset.ColumnarTable, rows_per_request:int)->list:
+    if rows_per_request <= 1:
+        return list(table.serialize_rows())
+    return [batch.serialize() for batch in table.batches(rows_per_request)]
+
+
+def _send(conns:list, connections:int, db_name:str, table_name:str, payloads:list):
+    """
+    Send payloads from `connections` threads per operator, each thread taking the next unsent payload
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    errors = []
+
+    def _sender(conn:str):
+        while True:
+            with lock:
+                index = next(counter)
+            if index >= len(payloads):
+                return
+            try:
+                put_data(conn=conn, payload=payloads[index], dbms=db_name, table=table_name)
+            except Exception as error:
+                errors.append(str(error))
+                return
+
+    threads = [threading.Thread(target=_sender, args=(conn,), name=f"sweep-{conn}-{index}")
+               for conn in conns for index in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise Exception(f"Failed to insert into {db_name}.{table_name} (Error: {errors[0]})")
+
+
+def _row_count(query_conn:str, db_name:str, table_name:str)->int:
+    query = f"sql {db_name} format=json and stat=false SELECT count(*) AS row_count FROM {table_name}"
+    try:
+        return get_data(conn=query_conn, query=query).json()['Query'][0]['row_count']
+    except Exception as error:
+        raise Exception(f"Failed to count the rows of {db_name}.{table_name} (Error: {error})")
+
+
+def _wait_for_rows(query_conn:str, db_name:str, table_name:str, expected:int, timeout:float=VERIFY_TIMEOUT)->int:
+    """
+    Poll the row count until it reaches expected or timeout - a query error is retried while the table is being
+    (re)created, and raised when the count still can't be read at the timeout
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            count = _row_count(query_conn, db_name, table_name)
+            error = None
+        except Exception as query_error:
+            count, error = 0, query_error
+        if count >= expected or time.perf_counter() >= deadline:
+            break
+        tracing.sleep(VERIFY_INTERVAL, reason='wait for row count')
+    if error:
+        raise error
+    return count
+
+
+def _drop_table(conns:list, db_name:str, table_name:str):
+    try:
+        drop_table(conn=conns, dbms=db_name, table=table_name)
+    except Exception as error:
+        print(f"Failed to drop {db_name}.{table_name} ({error})")
+
+
+def run_cell(query_conn:str, conns:list, db_name:str, table_name:str, table:dataset.ColumnarTable,
+             connections:int, rows_per_request:int)->dict:
+    """
+    Insert the table once with the given configuration and verify the row count - table_name is dropped before and
+    after the cell
+    """
+    payloads = _payloads(table, rows_per_request)
+    _drop_table(conns, db_name, table_name)
+    try:
+        with tracing.span(f"sweep {table_name}", category='ingest', operators=len(conns), connections=connections,
+                          rows_per_request=rows_per_request):
+            start = time.perf_counter()
+            _send(conns=conns, connections=connections, db_name=db_name, table_name=table_name, payloads=payloads)
+            sent = time.perf_counter() - start
+            flush_buffer(conn=conns, wait=0)
+            count = _wait_for_rows(query_conn, db_name, table_name, len(table))
+            queryable = time.perf_counter() - start
+    finally:
+        _drop_table(conns, db_name, table_name)
+
+    return {
+        'table': table_name,
+        'operators': len(conns),
+        'connections': connections,
+        'rows_per_request': rows_per_request,
+        'requests': len(payloads),
+        'rows': len(table),
+        'count': count,
+        'verified': count == len(table),
+        'send_seconds': sent,
+        'queryable_seconds': queryable,
+        'rows_per_second': len(table) / sent if sent else 0
+    }
+
+
+def sweep(query_conn:str, operators:list, db_name:str, table:dataset.ColumnarTable, operator_counts:list=None,
+          connections:list=(1, 2, 4), rows_per_request:list=(1, 100, 1000))->list:
+    results = []
+    operator_counts = sorted({min(count, len(operators)) for count in operator_counts or concurrency_levels(len(operators))})
+    cells = list(itertools.product(operator_counts, connections, rows_per_request))
+    for cell, (operator_count, connection_count, batch_size) in enumerate(cells):
+        table_name = f"{table.name}_sweep"
+        print(f"[{cell + 1}/{len(cells)}] {operator_count} operator(s), {connection_count} connection(s) per operator, "
+              f"{batch_size} row(s) per request -> {db_name}.{table_name}")
+        result = run_cell(query_conn=query_conn, conns=operators[:operator_count], db_name=db_name,
+                          table_name=table_name, table=table, connections=connection_count,
+                          rows_per_request=batch_size)
+        tracing.counter("ingest sweep", rows_per_second=result['rows_per_second'])
+        results.append(result)
+    return results
+
+
+def report(results:list)->str:
+    """
+    rows/sec per configuration, and the best (verified) one
+    """
+    if not results:
+        return "No ingest sweep results"
+
+    header = ['operators', 'connections', 'rows/request', 'requests', 'rows', 'send s', 'rows/s', 'queryable s', 'verified']
+    rows = []
+    for result in results:
+        rows.append([str(result['operators']), str(result['connections']), str(result['rows_per_request']),
+                     str(result['requests']), str(result['rows']), f"{result['send_seconds']:.2f}",
+                     f"{result['rows_per_second']:,.0f}", f"{result['queryable_seconds']:.2f}",
+                     'yes' if result['verified'] else f"no ({result['count']}/{result['rows']})"])
+
+    widths = [max(len(row[index]) for row in rows + [header]) for index in range(len(header))]
+    lines = ["Ingest sweep"]
+    lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(header)))
+    lines.append("  ".join("-" * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(row)))
+
+    verified = [result for result in results if result['verified']]
+    if verified:
+        best = max(verified, key=lambda result: result['rows_per_second'])
+        lines.append(f"Best: {best['operators']} operator(s), {best['connections']} connection(s) per operator, "
+                     f"{best['rows_per_request']} row(s) per request - {best['rows_per_second']:,.0f} rows/s")
+    else:
+        lines.append("No configuration inserted the full dataset")
+    return "\n".join(lines)
+
+
+def _int_list(value:str)->list:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+if __name__ == '__main__':
+    parse = argparse.ArgumentParser(description="Ingest a fixed dataset over a grid of operators / connections / batch sizes",
+                                    formatter_class=argparse.RawDescriptionHelpFormatter,
+                                    epilog="\nRun from the repository root:\n    python3 -m source.ingest_sweep --query 10.0.0.1:32349 "
+                                           "--operator 10.0.0.2:32149,10.0.0.3:32149 --db-name sweep_test")
+    parse.add_argument('--query', type=str, required=True, help='Query node IP:port (used to verify row counts)')
+    parse.add_argument('--operator', type=str, required=True, help='Comma-separated operator node IPs')
+    parse.add_argument('--db-name', type=str, required=True, help='scratch logical database name')
+    parse.add_argument('--table', type=str, default='rand_data', help='data/ table to insert')
+    parse.add_argument('--operator-counts', type=_int_list, default=None, help='comma separated number of operators to use (default: 1, 2, 4 ... all)')
+    parse.add_argument('--connections', type=_int_list, default=[1, 2, 4], help='comma separated concurrent connections per operator')
+    parse.add_argument('--rows-per-request', type=_int_list, default=[1, 100, 1000], help='comma separated rows per PUT request')
+    parse.add_argument('--trace', type=str, default=None, help='Write a Chrome Trace Event timeline of the sweep into file')
+    args = parse.parse_args()
+
+    operators = args.operator.split(",")
+    if args.trace:
+        rest_call.add_sink(tracing.start())
+
+    results = sweep(query_conn=args.query, operators=operators, db_name=args.db_name,
+                    table=dataset.load_table(args.table), operator_counts=args.operator_counts,
+                    connections=args.connections, rows_per_request=args.rows_per_request)
+    print(report(results))
+    if args.trace:
+        tracing.TRACER.write(args.trace)
@@ -1,10 +1,15 @@
 import argparse
-import json
+import concurrent.futures
+import heapq
 import os
-import datetime
 import random
 import threading
 
+from source import adaptive_ingest
+from source import dataset
+from source import ingest_fingerprint
+from source import profiler
+from source import tracing
 from source.rest_call import put_data
 
 CONNS = []
@@ -12,70 +17,198 @@ LAST_CONN = None
 ROOT_DIR = os.path.dirname(__file__).rsplit('source', 1)[0]
 DATA_FILES = [os.path.join(ROOT_DIR, 'data', fname) for fname in os.listdir(os.path.join(ROOT_DIR, 'data')) if fname.endswith("json")]
 
-def _sort_data(records:list)->list:
-    for i in range(len(records)):
-        records[i]['timestamp'] = datetime.datetime.strptime(records[i]['timestamp'], "%Y-%m-%dT%H:%M:%S.%fZ")
-
-    records.sort(key=lambda item: item["timestamp"])
-
-    for i in range(len(records)):
-        records[i]['timestamp'] = records[i]['timestamp'].strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-    return records
-
-
-def _insert_data(conns:list, db_name:str, table_name:str, file_path:str, sort_timestamps:bool=False, batch:bool=False):
-    payload = []
+def _catch_errors(func, table_name:str, errors:dict):
+    """
+    Thread target wrapper - record the table of a failed insert (errors: table -> error), then re-raise
+    """
+    def _target(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            errors[table_name] = str(error)
+            raise
+    return _target
+
+
+def _put_payloads(conns:list, db_name:str, table_name:str, payloads):
+    """
+    Send serialized payloads, moving to a different operator between each PUT when more than one is available
+    """
+    conn = random.choice(conns)
+    for serialized_payload in payloads:
+        put_data(conn=conn, dbms=db_name, table=table_name, payload=serialized_payload)
+        if len(conns) > 1:
+            last_conn = conn
+            while last_conn == conn:
+                conn = random.choice(conns)
+
+
+def _insert_data(conns:list, db_name:str, table_name:str, file_path:str, sort_timestamps:bool=False, batch:bool=False,
+                 adaptive:bool=False):
+    with tracing.span(f"ingest {table_name}", category='ingest', file=file_path):
+        _insert_table(conns=conns, db_name=db_name, table_name=table_name, file_path=file_path,
+                      sort_timestamps=sort_timestamps, batch=batch, adaptive=adaptive)
+
+
+def _insert_table(conns:list, db_name:str, table_name:str, file_path:str, sort_timestamps:bool=False, batch:bool=False,
+                  adaptive:bool=False):
+    with tracing.span("load data file", category='ingest', file=file_path):
+        table = dataset.load_file(file_path)
+
+    if len(table):
+        if sort_timestamps:
+            table = table.sort_by(dataset.TIMESTAMP_COLUMN)
+        if adaptive:
+            adaptive_ingest.insert_table(conns=conns, db_name=db_name, table_name=table_name, table=table, ordered=sort_timestamps)
+        elif batch:
+            _put_payloads(conns=conns, db_name=db_name, table_name=table_name, payloads=[table.serialize()])
+        else:
+            _put_payloads(conns=conns, db_name=db_name, table_name=table_name, payloads=table.serialize_rows())
+
+
+def _shard_file(file_path:str, shards:int)->list:
+    """
+    Split a file into (start, end) byte ranges of roughly equal size, each starting and ending on a line boundary
+    """
+    size = os.path.getsize(file_path)
+    if shards <= 1 or size == 0:
+        return [(0, size)]
+
+    ranges = []
+    start = 0
+    with open(file_path, "rb") as f:
+        for i in range(1, shards):
+            offset = size * i // shards
+            if offset <= start:
+                continue
+            f.seek(offset - 1)
+            f.readline()  # move to the end of the line containing offset - 1
+            end = f.tell()
+            if end >= size:
+                break
+            ranges.append((start, end))
+            start = end
+    ranges.append((start, size))
+    return ranges
+
+
+def _encode_shard(file_path:str, start:int, end:int, sort_timestamps:bool=False, cache_file:str=None)->list:
+    """
+    Parse and serialize the rows within a byte range of a data file (runs in a worker process) - when cache_file is
+    set, [start, end) is a range of rows within the cached table instead
+    :return:
+        list of serialized rows, or (epoch micros, row) pairs when sort_timestamps is set
+    """
+    if cache_file:
+        table = dataset.read_cache(cache_file, start, end)
+    else:
+        table = dataset.load_file(file_path, start=start, end=end)
+    if not len(table):
+        return []
+
+    if sort_timestamps:
+        table = table.sort_by(dataset.TIMESTAMP_COLUMN)
+        timestamps = table[dataset.TIMESTAMP_COLUMN].values
+        return [(timestamps[index], serialized_payload) for index, serialized_payload in enumerate(table.serialize_rows())]
+    return list(table.serialize_rows())
+
+
+def _shard_result(future, index:int)->list:
+    with tracing.span("wait for encoded shard", category='ingest', shard=index):
+        return future.result()
+
+
+def _insert_data_sharded(executor, conns:list, db_name:str, table_name:str, file_path:str, sort_timestamps:bool=False,
+                         batch:bool=False, workers:int=1):
+    """
+    Encode a data file in parallel (byte-range shards in a process pool) and send the rows in file order - or
+    chronological order when sort_timestamps is set, by merging the per-shard sorted results. With batch, the rows of
+    all the shards are sent as a single JSON list (one PUT, as without workers).
+    """
+    cache_file = dataset.fresh_cache(file_path) if dataset.USE_CACHE else None
+    if cache_file:
+        row_count = dataset.cache_length(cache_file)
+        shards = [(row_count * i // workers, row_count * (i + 1) // workers) for i in range(workers)]
+    else:
+        shards = _shard_file(file_path, workers)
+
+    futures = [executor.submit(_encode_shard, file_path, start, end, sort_timestamps, cache_file) for start, end in shards]
     try:
-        with open(file_path, "r") as f:
-            for line in f:
-                line = line.strip()  # remove whitespace at both ends
-                line = line.rstrip(",")  # remove any trailing comma
-                if line:
-                    try:
-                        payload.append(json.loads(line))
-                    except Exception as error:
-                        raise Exception(f"Failed to read content from {file_path} (line: {line} | Error: {error})")
+        with tracing.span(f"ingest {table_name}", category='ingest', file=file_path, shards=len(shards)):
+            if sort_timestamps:
+                # shards are sorted by epoch microseconds, merge them into a single chronological stream
+                merged = heapq.merge(*(_shard_result(future, index) for index, future in enumerate(futures)), key=lambda item: item[0])
+                payloads = (serialized_payload for _, serialized_payload in merged)
+            else:
+                payloads = (serialized_payload for index, future in enumerate(futures) for serialized_payload in _shard_result(future, index))
+            if batch:
+                rows = list(payloads)
+                payloads = ["[" + ", ".join(rows) + "]"] if rows else []  # same separators as json.dumps / serialize
+            _put_payloads(conns=conns, db_name=db_name, table_name=table_name, payloads=payloads)
     except Exception as error:
-        raise Exception(f"Failed to read content from {file_path} (Error: {error})")
-
-    if payload:
-        if sort_timestamps:
-            payload = _sort_data(payload)
-        conn = random.choice(conns)
-        if batch:
-            serialized_payload = json.dumps(payload)
-            put_data(conn=conn, dbms=db_name, table=table_name, payload=serialized_payload)
+        raise Exception(f"Failed to insert content from {file_path} (Error: {error})")
+
+
+def insert_data(conns:list, db_name:str, sort_timestamps:bool=False, batch:bool=False, workers:int=0, adaptive:bool=False,
+                query_conn:str=None, force:bool=False):
+    """
+    Insert every data file, one thread per file
+    :args:
+        workers:int - when set, JSON parsing / serialization is sharded across a pool of worker processes
+        adaptive:bool - size PUTs (rows per PUT / PUTs in flight) with an AIMD controller, see adaptive_ingest.py
+                        (payloads are built in the insert threads, so workers is not used)
+        query_conn:str - when set (with db_name), only tables that are new or empty in the database are inserted - see
+                         ingest_fingerprint.py
+        force:bool - insert every table, even when it's already loaded
+    """
+    data_files = DATA_FILES
+    fingerprints = None
+    if query_conn and db_name:
+        files = {}
+        for fname in DATA_FILES:
+            files.setdefault(dataset.table_name(fname), []).append(fname)
+        if force:
+            fingerprints = {table: ingest_fingerprint.local_fingerprint(table_files) for table, table_files in files.items()}
         else:
-            for row in payload:
-                serialized_payload = json.dumps(row)
-                put_data(conn=conn, dbms=db_name, table=table_name, payload=serialized_payload)
-                if len(conns) > 1:
-                    last_conn = conn
-                    while last_conn == conn:
-                        conn = random.choice(conns)
-
+            fingerprints, skipped = ingest_fingerprint.tables_to_insert(conn=query_conn, db_name=db_name, files=files)
+            for table, reason in skipped.items():
+                print(f"Skipping {table} ({reason}) - use --force-insert to insert it anyway")
+        data_files = [fname for fname in DATA_FILES if dataset.table_name(fname) in fingerprints]
 
+    executor = None
+    if workers and workers > 0 and not adaptive:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
 
-def insert_data(conns:list, db_name:str, sort_timestamps:bool=False, batch:bool=False):
     threads = []
-    for fname in DATA_FILES:
+    errors = {}  # table -> error of a failed insert thread
+    for fname in data_files:
         if not os.path.isfile(fname):
             raise FileNotFoundError(f"File {fname} not found")
 
-        payload = []
         if not db_name:
             db_name, table, *_ = fname.split(".")
         else:
             _, table, *_ = fname.split(".")
 
-        t = threading.Thread(target=_insert_data, args=(conns, db_name, table, fname, sort_timestamps, batch))
+        if executor:
+            t = threading.Thread(target=_catch_errors(profiler.wrap(_insert_data_sharded), table, errors), args=(executor, conns, db_name, table, fname, sort_timestamps, batch, workers))
+        else:
+            t = threading.Thread(target=_catch_errors(profiler.wrap(_insert_data), table, errors), args=(conns, db_name, table, fname, sort_timestamps, batch, adaptive))
         t.start()
         threads.append(t)
 
     for t in threads:
         t.join()
 
+    if executor:
+        executor.shutdown()
+
+    for table, error in errors.items():
+        print(f"Failed to insert {table} - its fingerprint is not recorded (Error: {error})")
+    fingerprints = {table: fingerprint for table, fingerprint in (fingerprints or {}).items() if table not in errors}
+    if fingerprints:
+        ingest_fingerprint.record(conn=query_conn, db_name=db_name, fingerprints=fingerprints)
+
 
 if __name__ == '__main__':
     parse = argparse.ArgumentParser()
@@ -84,6 +217,11 @@ if __name__ == '__main__':
     parse.add_argument('--sort-timestamps', type=bool, nargs='?', const=True, default=False,
                        help='Insert values chronological order')
     parse.add_argument('--batch', type=bool, nargs='?', const=True, default=False, help='Insert a single data in batch')
+    parse.add_argument('--workers', type=int, default=0, help='Number of worker processes used to parse / encode data files')
+    parse.add_argument('--adaptive-batch', type=bool, nargs='?', const=True, default=False, help='Adjust rows per PUT / PUTs in flight based on observed latency and errors')
+    parse.add_argument('--query', type=str, default=None, help='REST conn for query node - skip tables already loaded in db-name')
+    parse.add_argument('--force-insert', type=bool, nargs='?', const=True, default=False, help='Insert tables even when they are already loaded')
     args = parse.parse_args()
 
-    insert_data(conn=args.conn.split(","), db_name=args.db_name, sort_timestamps=args.sort_Timestmaps, batch=args.batch)
+    insert_data(conns=args.conn.split(","), db_name=args.db_name, sort_timestamps=args.sort_timestamps, batch=args.batch,
+                workers=args.workers, adaptive=args.adaptive_batch, query_conn=args.query, force=args.force_insert)
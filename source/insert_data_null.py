@@ -1,6 +1,13 @@
+import hashlib
 import json
+import os
 import random
 import source.rest_call as rest_call
+from source import data_generator
+from source import dataset
+from source import ingest_fingerprint
+from source import support
+from source import tracing
 
 DATA = [
     # full data
@@ -14,8 +21,145 @@ DATA = [
     {                                           "acct": "Don",  "value1": 3,  "value2":3}, # fails to insert when timestamp is NULL
 ]
 
+# column -> (null ratio, missing-key ratio) of the scaled t1 rows - a null value is sent as JSON null, a missing one
+# is left out of the row
+RATIOS = {
+    'acct': (0.05, 0.05),
+    'value1': (0.0, 0.0),
+    'value2': (0.1, 0.1)
+}
+ACCOUNTS = ('Mike', 'Bruce', 'Kyle', 'Don', 'Alfred', 'Selina', 'Barbara', 'Dick')
 
-def insert_data(conns:list, db_name:str):
+
+def generate_rows(rows:int, ratios:dict=None, seed:int=0):
+    """
+    Yield `rows` t1 like rows, each column null / missing at its ratios (RATIOS by default) - timestamps are unique
+    """
+    ratios = RATIOS if ratios is None else ratios
+    generator = random.Random(seed)
+    for number in range(rows):
+        values = {
+            'timestamp': data_generator.timestamp(number),
+            'acct': generator.choice(ACCOUNTS),
+            'value1': generator.randrange(0, 100),
+            'value2': generator.randrange(0, 100)
+        }
+        row = {}
+        for column, value in values.items():
+            null_ratio, missing_ratio = ratios.get(column, (0.0, 0.0))
+            draw = generator.random()
+            if draw < missing_ratio:
+                continue
+            row[column] = None if draw < missing_ratio + null_ratio else value
+        yield row
+
+
+class NullStats:
+    """
+    Expected count(*), count([column]), avg([column]) and [column] IS NULL counts of the generated rows
+    """
+    def __init__(self):
+        self.rows = 0
+        self.counts = {}
+        self.sums = {}
+
+    def update(self, batch:list):
+        for row in batch:
+            self.rows += 1
+            for column, value in row.items():
+                if value is not None:
+                    self.counts[column] = self.counts.get(column, 0) + 1
+                    if isinstance(value, (int, float)):
+                        self.sums[column] = self.sums.get(column, 0) + value
+
+    def count(self, column:str)->int:
+        return self.counts.get(column, 0)
+
+    def avg(self, column:str):
+        return self.sums[column] / self.counts[column] if self.counts.get(column) else None
+
+    def nulls(self, column:str)->int:
+        return self.rows - self.count(column)
+
+    def to_dict(self)->dict:
+        return {'rows': self.rows, 'counts': self.counts, 'sums': self.sums}
+
+    @classmethod
+    def from_dict(cls, content:dict):
+        stats = cls()
+        stats.rows = content['rows']
+        stats.counts = content['counts']
+        stats.sums = content['sums']
+        return stats
+
+
+def _stats_path(rows:int, ratios:dict=None, seed:int=0)->str:
+    key = json.dumps({'rows': rows, 'ratios': RATIOS if ratios is None else ratios, 'seed': seed}, sort_keys=True)
+    return os.path.join(dataset.CACHE_DIR, f"null_stats.{hashlib.sha256(key.encode()).hexdigest()[:16]}.json")
+
+
+def _save_stats(stats:NullStats, rows:int, ratios:dict=None, seed:int=0):
+    try:
+        support.create_dir(dataset.CACHE_DIR)
+        support.write_file(_stats_path(rows, ratios, seed), json.dumps(stats.to_dict()))
+    except Exception as error:
+        print(f"Failed to cache the expected values of the generated rows ({error})")
+
+
+def expected_stats(rows:int, ratios:dict=None, seed:int=0)->NullStats:
+    """
+    NullStats of generate_rows(rows, ratios, seed) - read from the cache when computed before, so a table that is
+    already loaded does not need the rows generated again
+    """
+    try:
+        with open(_stats_path(rows, ratios, seed), 'r') as f:
+            return NullStats.from_dict(json.load(f))
+    except Exception:
+        pass
+    stats = NullStats()
+    for batch in data_generator.batches(generate_rows(rows=rows, ratios=ratios, seed=seed), 5000):
+        stats.update(batch)
+    _save_stats(stats, rows, ratios, seed)
+    return stats
+
+
+def insert_scaled(conns:list, db_name:str, rows:int, table:str='t1_scaled', ratios:dict=None, batch_size:int=5000,
+                  seed:int=0, ingest:bool=True)->NullStats:
+    """
+    Insert `rows` generated rows in batches (ingest=False only returns the expectations, for a table already loaded -
+    see expected_stats)
+    :return:
+        NullStats of the generated rows
+    """
+    if not ingest:
+        return expected_stats(rows=rows, ratios=ratios, seed=seed)
+
+    stats = NullStats()
+    data_generator.ingest(conns=conns, db_name=db_name, table=table, rows=generate_rows(rows=rows, ratios=ratios, seed=seed),
+                          batch_size=batch_size, on_batch=stats.update)
+    rest_call.flush_buffer(conn=conns)
+    _save_stats(stats, rows, ratios, seed)
+    return stats
+
+
+def insert_data(conns:list, db_name:str, query_conn:str=None, force:bool=False):
+    """
+    Insert DATA into t1 - skipped when query_conn is set and t1 already holds len(DATA) rows (unless force)
+    """
+    if query_conn and not force:
+        try:
+            remote = ingest_fingerprint.remote_fingerprint(conn=query_conn, db_name=db_name, table="t1")
+        except Exception as error:
+            print(f"Skipping t1 ({error}) - use --force-insert to insert it anyway")
+            return
+        if remote and remote['rows'] == len(DATA):
+            print(f"Skipping t1 ({len(DATA)} rows already in {db_name}) - use --force-insert to insert it again")
+            return
+    with tracing.span("ingest t1", category='ingest'):
+        _insert_data(conns=conns, db_name=db_name)
+
+
+def _insert_data(conns:list, db_name:str):
     conn = random.choice(conns)
     for row in DATA:
         rest_call.put_data(conn=conn, payload=json.dumps(row), dbms=db_name, table="t1")
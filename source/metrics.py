@@ -0,0 +1,152 @@
+"""
+Sinks for the request timing events emitted by `rest_call.execute_request`
+
+- MetricsAggregator - in-memory latency histogram / byte counters per node and command, printable as a table
+- PrometheusFileSink - MetricsAggregator that writes its content in the Prometheus text exposition format
+
+Usage:
+    aggregator = MetricsAggregator()
+    rest_call.add_sink(aggregator)
+    ...
+    print(aggregator.report())
+"""
+import os
+import threading
+
+# latency histogram upper bounds (seconds, inclusive - as Prometheus `le`)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float('inf'))
+PHASES = ('dns', 'connect', 'ttfb', 'total')
+
+
+def _bucket_label(bound:float)->str:
+    if bound == float('inf'):
+        return f">{BUCKETS[-2]:g}s"
+    return f"<={bound * 1000:g}ms" if bound < 1 else f"<={bound:g}s"
+
+
+def percentile(values:list, percent:float):
+    """
+    Nearest-rank percentile of a list of numbers (None if empty)
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class _Series:
+    def __init__(self):
+        self.latencies = []
+        self.buckets = [0] * len(BUCKETS)
+        self.phases = {phase: 0.0 for phase in PHASES}
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses = {}
+        self.errors = 0
+
+
+class MetricsAggregator:
+    def __init__(self):
+        self.series = {}  # (node, label) -> _Series
+        self.lock = threading.Lock()
+
+    def record(self, event:dict):
+        key = (event.get('node'), event.get('label'))
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series()
+            total = event.get('total') or 0
+            series.latencies.append(total)
+            for index, bound in enumerate(BUCKETS):
+                if total <= bound:
+                    series.buckets[index] += 1
+                    break
+            for phase in PHASES:
+                series.phases[phase] += event.get(phase) or 0
+            series.request_bytes += event.get('request_bytes') or 0
+            series.response_bytes += event.get('response_bytes') or 0
+            status = str(event.get('status'))
+            series.statuses[status] = series.statuses.get(status, 0) + 1
+            if event.get('error'):
+                series.errors += 1
+
+    def report(self)->str:
+        """
+        Per node / command latency histogram
+        """
+        with self.lock:
+            items = sorted(self.series.items(), key=lambda item: (str(item[0][0]), str(item[0][1])))
+            if not items:
+                return "No requests recorded"
+
+            header = ['node', 'command', 'count', 'errors', 'p50 ms', 'p95 ms', 'max ms'] + [_bucket_label(bound) for bound in BUCKETS]
+            rows = []
+            for (node, label), series in items:
+                rows.append([str(node), str(label), str(len(series.latencies)), str(series.errors),
+                             f"{percentile(series.latencies, 50) * 1000:.1f}", f"{percentile(series.latencies, 95) * 1000:.1f}",
+                             f"{max(series.latencies) * 1000:.1f}"] + [str(count) for count in series.buckets])
+
+        widths = [max(len(row[index]) for row in rows + [header]) for index in range(len(header))]
+        lines = ["Request latency per node / command"]
+        lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(header)))
+        lines.append("  ".join("-" * width for width in widths))
+        for row in rows:
+            lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(row)))
+        return "\n".join(lines)
+
+
+def _escape(value)->str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusFileSink(MetricsAggregator):
+    def __init__(self, file_path:str):
+        super().__init__()
+        self.file_path = os.path.expanduser(os.path.expandvars(file_path))
+
+    def render(self)->str:
+        lines = [
+            "# HELP edgecase_request_duration_seconds REST request latency",
+            "# TYPE edgecase_request_duration_seconds histogram"
+        ]
+        with self.lock:
+            items = sorted(self.series.items(), key=lambda item: (str(item[0][0]), str(item[0][1])))
+            for (node, label), series in items:
+                labels = f'node="{_escape(node)}",command="{_escape(label)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, series.buckets):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                    lines.append(f'edgecase_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"edgecase_request_duration_seconds_sum{{{labels}}} {sum(series.latencies)}")
+                lines.append(f"edgecase_request_duration_seconds_count{{{labels}}} {len(series.latencies)}")
+
+            lines += ["# HELP edgecase_request_phase_seconds_total Time spent per request phase",
+                      "# TYPE edgecase_request_phase_seconds_total counter"]
+            for (node, label), series in items:
+                for phase in PHASES:
+                    lines.append(f'edgecase_request_phase_seconds_total{{node="{_escape(node)}",command="{_escape(label)}",phase="{phase}"}} {series.phases[phase]}')
+
+            lines += ["# HELP edgecase_request_bytes_total Bytes sent / received",
+                      "# TYPE edgecase_request_bytes_total counter"]
+            for (node, label), series in items:
+                labels = f'node="{_escape(node)}",command="{_escape(label)}"'
+                lines.append(f'edgecase_request_bytes_total{{{labels},direction="request"}} {series.request_bytes}')
+                lines.append(f'edgecase_request_bytes_total{{{labels},direction="response"}} {series.response_bytes}')
+
+            lines += ["# HELP edgecase_requests_total Requests by HTTP status",
+                      "# TYPE edgecase_requests_total counter"]
+            for (node, label), series in items:
+                for status, count in sorted(series.statuses.items()):
+                    lines.append(f'edgecase_requests_total{{node="{_escape(node)}",command="{_escape(label)}",status="{_escape(status)}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        try:
+            with open(self.file_path, 'w') as f:
+                f.write(self.render())
+        except Exception as error:
+            raise Exception(f"Failed to write metrics into {self.file_path} (Error: {error})")
@@ -0,0 +1,166 @@
+"""
+Profile the harness itself - each phase (insert, flush, validation, each test group) is run under cProfile while
+tracemalloc tracks its peak memory and top allocation sites.
+
+Per phase a `profile_[phase].prof` file (open with `python -m pstats` / snakeviz) is written into actual/, along with
+a `profile_summary.txt` covering all phases. All helpers are no-ops unless `start()` was called.
+
+Before python 3.12, cProfile only sees the thread it was enabled in. Functions started in other threads are profiled
+when wrapped with `profiler.wrap` (ex. threading.Thread(target=profiler.wrap(func))). From 3.12, cProfile is built on
+sys.monitoring: the phase profile already sees every thread, and only one profile can be enabled at a time. There,
+wrap only counts the thread. Worker processes (--workers) are not profiled.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from source import support
+
+ROOT_DIR = os.path.dirname(__file__).rsplit('source', 1)[0]
+OUTPUT_DIR = os.path.join(ROOT_DIR, 'actual')
+TOP = 10  # functions / allocation sites listed per phase
+FRAMES = 1  # tracemalloc frames kept per allocation (lineno statistics only need 1)
+PER_THREAD = sys.version_info < (3, 12)  # cProfile is per thread (sys.setprofile) - from 3.12 it sees all threads
+
+PROFILER = None
+
+
+class Profiler:
+    def __init__(self, output_dir:str=OUTPUT_DIR):
+        self.output_dir = output_dir
+        support.create_dir(output_dir)
+        self.phases = []
+        self.active = None  # profiles of the running phase
+        self.threads = 0  # threads run (wrapped) during the running phase
+        self.lock = threading.Lock()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(FRAMES)
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+
+    @contextmanager
+    def phase(self, name:str):
+        if self.active is not None:
+            yield  # nested phases are part of the outer phase
+            return
+
+        profile = cProfile.Profile()
+        self.active = [profile]
+        self.threads = 1
+        before = self._snapshot()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            allocations = self._snapshot().compare_to(before, 'lineno')[:TOP]
+            with self.lock:
+                profiles, self.active = self.active, None
+            self._save(name=name, elapsed=elapsed, peak=peak, allocations=allocations, profiles=profiles,
+                       threads=self.threads)
+
+    def wrap(self, func):
+        """
+        Profile func into the phase running when it's called (for thread targets) - a profile of its own before 3.12,
+        the phase profile (which already sees the thread) from 3.12
+        """
+        def _profiled(*args, **kwargs):
+            with self.lock:
+                profiles = self.active
+                if profiles is not None:
+                    self.threads += 1
+            if profiles is None or not PER_THREAD:
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                with self.lock:
+                    profiles.append(profile)
+        return _profiled
+
+    def _save(self, name:str, elapsed:float, peak:int, allocations:list, profiles:list, threads:int):
+        slug = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+        file_path = os.path.join(self.output_dir, f"profile_{slug}.prof")
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        try:
+            stats.dump_stats(file_path)
+        except Exception as error:
+            raise Exception(f"Failed to write profile into {file_path} (Error: {error})")
+
+        content = io.StringIO()
+        stats.stream = content
+        stats.sort_stats('cumulative').print_stats(TOP)
+        self.phases.append({
+            'name': name,
+            'elapsed': elapsed,
+            'peak': peak,
+            'threads': threads,
+            'file': file_path,
+            'functions': content.getvalue().strip(),
+            'allocations': [str(stat) for stat in allocations]
+        })
+
+    def summary(self)->str:
+        lines = ["Profile per phase", f"{'phase':<32} {'seconds':>9} {'peak MB':>9} {'threads':>7}  file"]
+        for phase in self.phases:
+            lines.append(f"{phase['name']:<32} {phase['elapsed']:9.2f} {phase['peak'] / 1024 / 1024:9.2f} "
+                         f"{phase['threads']:7}  {os.path.basename(phase['file'])}")
+        for phase in self.phases:
+            lines += ["", "=" * 80, f"{phase['name']} - {phase['elapsed']:.2f}s, peak {phase['peak'] / 1024 / 1024:.2f} MB", "=" * 80]
+            lines.append(phase['functions'])
+            lines += ["", f"Top {TOP} allocation sites (growth during the phase)"]
+            lines += [f"  {allocation}" for allocation in phase['allocations']] or ["  -"]
+        return "\n".join(lines)
+
+    def write_summary(self)->str:
+        file_path = os.path.join(self.output_dir, "profile_summary.txt")
+        support.write_file(file_path, self.summary() + "\n")
+        return file_path
+
+
+def start(output_dir:str=OUTPUT_DIR)->Profiler:
+    global PROFILER
+    PROFILER = Profiler(output_dir=output_dir)
+    return PROFILER
+
+
+def stop():
+    global PROFILER
+    PROFILER = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@contextmanager
+def phase(name:str):
+    if PROFILER is None:
+        yield
+        return
+    with PROFILER.phase(name):
+        yield
+
+
+def wrap(func):
+    if PROFILER is None:
+        return func
+    return PROFILER.wrap(func)
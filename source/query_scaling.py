@@ -0,0 +1,142 @@
+"""
+Replay a mix of the suite's SQL queries from 1, 2, 4 ... N concurrent clients and report how throughput and latency
+change per concurrency level - showing where the query node saturates.
+
+Each client is a thread issuing the queries of QUERIES (round robin, starting at a different query per client) for
+`duration` seconds. A level is considered saturated when adding clients increased throughput by less than
+SATURATION_GAIN over the previous level.
+"""
+import threading
+import time
+
+from source import tracing
+from source.metrics import percentile
+from source.rest_call import get_data
+
+SATURATION_GAIN = 0.10
+
+# (name, query) - {db_name} is replaced with the logical database name
+QUERIES = [
+    ('aggregation', 'sql {db_name} format=json and stat=false "SELECT min(timestamp), max(timestamp), min(value), avg(value), max(value), count(*) FROM rand_data"'),
+    ('include', 'sql {db_name} format=json and stat=false and include=(rand_data, power_plant_pv) "SELECT COUNT(*) AS row_count FROM power_plant;"'),
+    ('group by', 'sql {db_name} format=json and stat=false and timezone=utc and include=(power_plant_pv) SELECT monitor_id, min(timestamp)::ljust(19) as min_ts, max(timestamp)::ljust(19) as max_ts, count(*) as row_count FROM power_plant GROUP BY monitor_id ORDER min_ts, monitor_id DESC'),
+    ('increments', 'sql {db_name} format=json and stat=false and timezone=utc "SELECT increments(day, 7, timestamp), min(timestamp)::ljust(19) as min_ts, max(timestamp)::ljust(19) as max_ts, min(value) as min_val, avg(value)::float(3) as avg_val, max(value) as max_val FROM rand_data ORDER BY min_ts, max_ts ASC;"'),
+    ('period', 'sql {db_name} format=json and stat=false and timezone=utc SELECT timestamp, pv FROM power_plant_pv WHERE period(day, 30, "2024-02-15 20:18:29", timestamp) ORDER BY timestamp DESC'),
+    ('timezone', 'sql {db_name} format=json and stat=false and timezone=America/Los_Angeles "SELECT min(timestamp), max(timestamp) FROM rand_data"'),
+]
+
+
+def concurrency_levels(max_clients:int)->list:
+    """
+    1, 2, 4 ... up to (and including) max_clients
+    """
+    levels = []
+    clients = 1
+    while clients < max_clients:
+        levels.append(clients)
+        clients *= 2
+    levels.append(max_clients)
+    return levels
+
+
+def run_level(conn:str, db_name:str, clients:int, duration:float)->dict:
+    """
+    Run `clients` concurrent clients for `duration` seconds
+    """
+    queries = [(name, query.format(db_name=db_name)) for name, query in QUERIES]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def _client(index:int, end_time:float):
+        position = index
+        while time.perf_counter() < end_time:
+            name, query = queries[position % len(queries)]
+            position += 1
+            start = time.perf_counter()
+            try:
+                get_data(conn=conn, query=query)
+            except Exception as error:
+                with lock:
+                    errors.append(f"{name}: {error}")
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    with tracing.span(f"query scaling - {clients} clients", category='phase'):
+        start_time = time.perf_counter()
+        end_time = start_time + duration
+        threads = [threading.Thread(target=_client, args=(index, end_time), name=f"client-{index}") for index in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start_time
+
+    result = {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'max': max(latencies) if latencies else None
+    }
+    tracing.counter("query throughput", requests_per_second=result['throughput'])
+    return result
+
+
+def run_scaling(conn:str, db_name:str, max_clients:int, duration:float=10)->list:
+    """
+    Run every concurrency level and mark the level at which the node saturates
+    """
+    results = []
+    for clients in concurrency_levels(max_clients):
+        print(f"Querying from {clients} concurrent client(s) for {duration:g}s")
+        result = run_level(conn=conn, db_name=db_name, clients=clients, duration=duration)
+        previous = results[-1] if results else None
+        result['speedup'] = result['throughput'] / results[0]['throughput'] if results and results[0]['throughput'] else 1.0
+        result['saturated'] = bool(previous and result['throughput'] < previous['throughput'] * (1 + SATURATION_GAIN))
+        results.append(result)
+    return results
+
+
+def _ms(value)->str:
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+def report(results:list)->str:
+    """
+    Throughput / latency per concurrency level
+    """
+    if not results:
+        return "No query scaling results"
+
+    header = ['clients', 'requests', 'errors', 'req/s', 'speedup', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms', '']
+    rows = []
+    for result in results:
+        rows.append([str(result['clients']), str(result['requests']), str(result['errors']), f"{result['throughput']:.1f}",
+                     f"{result['speedup']:.2f}x", _ms(result['p50']), _ms(result['p95']), _ms(result['p99']),
+                     _ms(result['max']), 'saturated' if result['saturated'] else ''])
+
+    widths = [max(len(row[index]) for row in rows + [header]) for index in range(len(header))]
+    lines = ["Query scaling per concurrency level"]
+    lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(header)).rstrip())
+    lines.append("  ".join("-" * width for width in widths).rstrip())
+    for row in rows:
+        lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(row)).rstrip())
+
+    best = max(results, key=lambda result: result['throughput'])
+    saturated = next((index for index, result in enumerate(results) if result['saturated']), None)
+    if saturated is not None:
+        lines.append(f"Query node saturates at {results[saturated - 1]['clients']} client(s) - more clients added less than "
+                     f"{SATURATION_GAIN:.0%} throughput (peak {best['throughput']:.1f} req/s with {best['clients']} client(s))")
+    else:
+        lines.append(f"No saturation up to {results[-1]['clients']} clients - peak {best['throughput']:.1f} req/s")
+    for result in results:
+        if result['first_error']:
+            lines.append(f"{result['clients']} clients - {result['errors']} failed requests (first: {result['first_error']})")
+    return "\n".join(lines)
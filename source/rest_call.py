@@ -1,19 +1,224 @@
+import codecs
+import json
+import re
+import socket
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
 
-def execute_request(func:str, conn:str, headers:dict, payload:str=None):
-    try:
+from source import tracing
+
+REQUEST_TIMEOUT = 300  # seconds to wait for a node to respond (None - wait forever)
+SINKS = []  # objects with a record(event:dict) method, called after every request (see source/metrics.py)
+_TIMINGS = threading.local()
+_DEADLINE = threading.local()
+_QUERY_START = re.compile(r'\s*\{\s*"Query"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+class RequestTimeout(Exception):
+    """A request did not complete within REQUEST_TIMEOUT or the deadline of the current thread"""
+
+
+class _TimedConnection(HTTPConnection):
+    """
+    HTTP connection that records DNS resolution and TCP connect time of the current thread's request
+    """
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            socket.getaddrinfo(getattr(self, '_dns_host', self.host), self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            pass  # reported by the actual connect below
+        resolved = time.perf_counter()
+        sock = super()._new_conn()
+        _TIMINGS.dns = resolved - start
+        _TIMINGS.connect = time.perf_counter() - resolved
+        return sock
+
+
+class _TimedConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {**self.poolmanager.pool_classes_by_scheme, 'http': _TimedConnectionPool}
+
+
+def set_deadline(deadline:float=None):
+    """
+    Epoch time by which requests made by the current thread must complete (None - only REQUEST_TIMEOUT applies) -
+    threads started by the current thread get it through with_deadline
+    """
+    _DEADLINE.value = deadline
+
+
+def get_deadline()->float:
+    return getattr(_DEADLINE, 'value', None)
+
+
+def with_deadline(func):
+    """
+    Run func (a thread / executor target) under the deadline of the thread wrapping it
+    """
+    deadline = get_deadline()
+
+    def _bounded(*args, **kwargs):
+        previous = get_deadline()
+        set_deadline(deadline)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            set_deadline(previous)
+    return _bounded
+
+
+def _timeout()->float:
+    deadline = get_deadline()
+    if deadline is None:
+        return REQUEST_TIMEOUT
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise requests.Timeout("time budget exhausted")
+    return remaining if REQUEST_TIMEOUT is None else min(REQUEST_TIMEOUT, remaining)
+
+
+def add_sink(sink):
+    SINKS.append(sink)
+
+
+def remove_sink(sink):
+    if sink in SINKS:
+        SINKS.remove(sink)
+
+
+def _command_label(func:str, headers:dict)->str:
+    """
+    Low-cardinality name for a request - `put dbms.table`, `sql dbms` or the first two words of the command
+    """
+    if func.upper() == 'PUT':
+        return f"put {headers.get('dbms')}.{headers.get('table')}"
+    return ' '.join(str(headers.get('command', '')).split()[:2])
+
+
+def _emit(event:dict):
+    for sink in list(SINKS):
+        try:
+            sink.record(event)
+        except Exception as error:
+            print(f"Failed to record request metrics in {type(sink).__name__} (Error: {error})")
+
+
+def _request(func:str, conn:str, headers:dict, payload:str=None, stream:bool=False):
+    if func.upper() not in ['GET', 'PUT', 'POST']:
+        raise ValueError(f'Invalid user input {func.upper()}')
+    timeout = _timeout()
+    if not SINKS:
         if func.upper() == 'GET':
-            response = requests.get(url=f"http://{conn}", headers=headers)
+            return requests.get(url=f"http://{conn}", headers=headers, timeout=timeout, stream=stream)
         elif func.upper() == 'PUT':
-            response = requests.put(url=f"http://{conn}", headers=headers, data=payload)
-        elif func.upper() == 'POST':
-            response = requests.post(url=f"http://{conn}", headers=headers, data=payload)
-        else:
-            raise ValueError(f'Invalid user input {func.upper()}')
+            return requests.put(url=f"http://{conn}", headers=headers, data=payload, timeout=timeout, stream=stream)
+        return requests.post(url=f"http://{conn}", headers=headers, data=payload, timeout=timeout, stream=stream)
+
+    session = requests.Session()
+    session.mount('http://', _TimedAdapter())
+    try:
+        return session.request(method=func.upper(), url=f"http://{conn}", headers=headers, data=payload,
+                               timeout=timeout, stream=stream)
+    finally:
+        if not stream:
+            session.close()  # a streamed response keeps its connection until the body is consumed
+
+
+def _with_stat(query:str)->str:
+    """
+    stat=true copy of a format=json sql query sent with stat=false (other commands are returned unchanged)
+    """
+    if query.strip().lower().startswith('sql ') and 'format=json' in query and 'stat=false' in query:
+        return query.replace('stat=false', 'stat=true', 1)
+    return query
+
+
+def _statistics(response):
+    """
+    The `Statistics` value of a stat=true JSON response - parsed from the end of the body only, where AnyLog puts it
+    """
+    try:
+        text = response.text
+        index = text.rfind('"Statistics"')
+        if index < 0:
+            return None
+        start = text.index(':', index) + 1
+        while text[start].isspace():
+            start += 1
+        return json.JSONDecoder().raw_decode(text, start)[0]
+    except Exception:
+        return None
+
+
+def _event(func:str, conn:str, headers:dict, payload, response, error_message:str, start:float, total:float,
+           response_bytes:int, dns:float=None, connect:float=None, stream:bool=False)->dict:
+    body = payload.encode() if isinstance(payload, str) else (payload or b'')
+    command = headers.get('command')
+    statistics = None
+    if response is not None and not stream and command and 'stat=true' in command:
+        statistics = _statistics(response)
+    return {
+        'node': conn,
+        'method': func.upper(),
+        'command': headers.get('command'),
+        'label': _command_label(func, headers),
+        'dbms': headers.get('dbms'),
+        'table': headers.get('table'),
+        'status': response.status_code if response is not None else None,
+        'error': error_message,
+        'start': start,
+        'dns': dns,
+        'connect': connect,
+        'ttfb': response.elapsed.total_seconds() if response is not None else None,
+        'total': total,
+        'request_bytes': sum(len(str(key)) + len(str(value)) + 4 for key, value in headers.items()) + len(body),
+        'response_bytes': response_bytes,
+        'statistics': statistics
+    }
+
+
+def execute_request(func:str, conn:str, headers:dict, payload:str=None, stream:bool=False):
+    """
+    Execute a REST request against an AnyLog node - when sinks are registered each request emits a timing event:
+        node, method, command, label, dbms, table, status, error,
+        start (epoch seconds), dns / connect / ttfb / total (seconds),
+        request_bytes (headers + body), response_bytes (body)
+
+    With stream=True the body is not read, and a successful request does not emit an event (the caller consuming the
+    body emits it - see get_data_stream)
+    """
+    _TIMINGS.dns = None
+    _TIMINGS.connect = None
+    start = time.time()
+    start_counter = time.perf_counter()
+    response = None
+    error_message = None
+    try:
+        response = _request(func=func, conn=conn, headers=headers, payload=payload, stream=stream)
         response.raise_for_status()
+    except requests.Timeout as error:
+        error_message = str(error)
+        raise RequestTimeout(f"Failed to execute {func.upper()} against {conn} (Error:  {error})")
     except Exception as error:
+        error_message = str(error)
         raise Exception(f"Failed to execute {func.upper()} against {conn} (Error:  {error})")
+    finally:
+        if SINKS and not (stream and error_message is None):
+            _emit(_event(func=func, conn=conn, headers=headers, payload=payload, response=response,
+                         error_message=error_message, start=start, total=time.perf_counter() - start_counter,
+                         response_bytes=len(response.content) if response is not None and not stream else 0,
+                         dns=_TIMINGS.dns, connect=_TIMINGS.connect, stream=stream))
     return response
 
 
@@ -40,9 +245,156 @@ def get_data(conn:str, query:str, destination:str='network'):
     return execute_request(func='GET', conn=conn, headers=headers, payload=None)
 
 
-def flush_buffer(conn:(str or list)):
+def iter_query_rows(chunks):
+    """
+    Incrementally parse the rows of a `{"Query": [...]}` body from an iterable of byte chunks - only the rows not yet
+    yielded are kept in memory. A body that is not a Query envelope (ex. a message) is parsed once complete, and yields
+    its Query rows if it has any.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    parser = json.JSONDecoder()
+    buffer = ''
+    envelope = None
+    in_rows = None  # None - envelope not seen yet, False - not a Query envelope / rows done
+    finished = False
+    chunks = iter(chunks)
+    while not finished:
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            buffer += decoder.decode(b'', final=True)
+        else:
+            buffer += decoder.decode(chunk)
+
+        if in_rows is None:
+            match = _QUERY_START.match(buffer)
+            if match:
+                in_rows = True
+                buffer = buffer[match.end():]
+            elif finished or len(buffer.lstrip()) >= len('{"Query":['):
+                in_rows = False
+                envelope = buffer
+                buffer = ''
+            else:
+                continue
+        elif in_rows is False:
+            if envelope is not None:
+                envelope += buffer
+            buffer = ''
+
+        position = 0
+        while in_rows:
+            position = _SEPARATORS.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            if buffer[position] == ']':
+                in_rows = False
+                envelope = None  # rest of the body (ex. Statistics) is not needed
+                break
+            try:
+                row, end = parser.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if finished:
+                    raise Exception(f"Failed to parse query results (Error: incomplete row at {buffer[position:position + 40]!r})")
+                break
+            if not finished and not isinstance(row, (dict, list, str)):
+                following = buffer[end:].lstrip()
+                if not following or following[0] not in ',]':
+                    break  # a number may continue in the next chunk (ex. `4` / `4.` followed by `5`)
+            yield row
+            position = end
+        buffer = buffer[position:]
+
+    if in_rows:
+        raise Exception("Failed to parse query results (Error: body ended inside the Query list)")
+    if envelope is not None:
+        try:
+            content = json.loads(envelope)
+        except Exception as error:
+            raise Exception(f"Failed to parse query results (Error: {error})")
+        if isinstance(content, dict):
+            yield from content.get('Query') or []
+
+
+def iter_text_lines(chunks):
+    """
+    Incrementally decode an iterable of byte chunks into lines (without the line break)
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        yield from lines
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def _get_stream(conn:str, query:str, destination:str, parse, chunk_size:int, stats:dict):
+    headers = {
+        'command': query,
+        'User-Agent': 'AnyLog/1.23',
+    }
+    if destination:
+        headers['destination'] = destination
+
+    start = time.time()
+    start_counter = time.perf_counter()
+    response = execute_request(func='GET', conn=conn, headers=headers, payload=None, stream=True)
+    dns, connect = _TIMINGS.dns, _TIMINGS.connect
+    received = 0
+    first_chunk = None
+    error_message = None
+
+    def _chunks():
+        nonlocal received, first_chunk
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start_counter
+            received += len(chunk)
+            yield chunk
+
+    try:
+        yield from parse(_chunks())
+    except requests.RequestException as error:
+        error_message = str(error)
+        raise Exception(f"Failed to execute GET against {conn} (Error:  {error})")
+    except Exception as error:
+        error_message = str(error)
+        raise
+    finally:
+        response.close()
+        total = time.perf_counter() - start_counter
+        if stats is not None:
+            stats.update({'response_bytes': received, 'first_chunk': first_chunk, 'total': total})
+        if SINKS:
+            _emit(_event(func='GET', conn=conn, headers=headers, payload=None, response=response,
+                         error_message=error_message, start=start, total=total, response_bytes=received,
+                         dns=dns, connect=connect))
+
+
+def get_data_stream(conn:str, query:str, destination:str='network', chunk_size:int=64 * 1024, stats:dict=None):
+    """
+    Same as get_data, but yields the rows of the `Query` result while the body is being received, instead of
+    buffering the whole response. When a stats dict is passed, it's updated with response_bytes, first_chunk and
+    total (seconds) once the body is consumed.
+    """
+    return _get_stream(conn=conn, query=query, destination=destination, parse=iter_query_rows,
+                       chunk_size=chunk_size, stats=stats)
+
+
+def get_text_stream(conn:str, query:str, destination:str='network', chunk_size:int=64 * 1024, stats:dict=None):
     """
-    Code to flush insert data buffers
+    Same as get_data_stream, but yields the lines of the body (ex. format=table results)
+    """
+    return _get_stream(conn=conn, query=query, destination=destination, parse=iter_text_lines,
+                       chunk_size=chunk_size, stats=stats)
+
+
+def flush_buffer(conn:(str or list), wait:float=5):
+    """
+    Code to flush insert data buffers - then wait `wait` seconds for the data to be stored
     """
     headers = {"command": "flush buffers", "User-Agent": "AnyLog/1.23"}
     if isinstance(conn, str):
@@ -50,5 +402,26 @@ def flush_buffer(conn:(str or list)):
     else:
         for con in conn:
             execute_request(func='POST', conn=con, headers=headers, payload=None)
-    time.sleep(5)
+    if wait:
+        tracing.sleep(wait, reason='flush buffers wait')
+
+
+def connect_dbms(conn:(str or list), dbms:str, db_type:str='sqlite'):
+    """
+    Connect a logical database on the operator(s) - skipped on the ones where `get databases` already lists it
+    """
+    headers = {"command": f"connect dbms {dbms} where type = {db_type}", "User-Agent": "AnyLog/1.23"}
+    for con in [conn] if isinstance(conn, str) else conn:
+        databases = get_data(con, "get databases", destination="").text
+        if not re.search(rf"(?<![\w.]){re.escape(dbms)}(?![\w.])", databases):
+            execute_request(func='POST', conn=con, headers=headers, payload=None)
+
+
+def drop_table(conn:(str or list), dbms:str, table:str):
+    """
+    Drop a table from the operator(s) local database - used to remove the scratch tables the suite creates
+    """
+    headers = {"command": f"drop table {table} where dbms = {dbms}", "User-Agent": "AnyLog/1.23"}
+    for con in [conn] if isinstance(conn, str) else conn:
+        execute_request(func='POST', conn=con, headers=headers, payload=None)
 
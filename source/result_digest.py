@@ -0,0 +1,85 @@
+"""
+Canonical digest of a query result (the rows of a `{"Query": [...]}` response), computed as rows stream in
+
+- ordered=True  - rows are chained into a single sha256, so the same rows in a different order give a different digest
+- ordered=False - row hashes are summed (mod 2^256), so the digest does not depend on the row order
+
+Rows are canonicalized before hashing - keys are sorted, floats are rounded to `float_places` (when set) and integral
+floats are hashed as ints (1.0 == 1, same as assertEqual).
+
+Usage:
+    digest = ResultDigest(ordered=False, float_places=6)
+    for row in rows:
+        digest.update(row)
+    if digest.hexdigest() != expected_digest:
+        ... materialize / diff the rows
+"""
+import hashlib
+import json
+
+_MODULUS = 2 ** 256
+
+
+def _canonical(value, float_places:int=None):
+    if isinstance(value, float):
+        if float_places is not None:
+            value = round(value, float_places)
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, dict):
+        return {str(key): _canonical(item, float_places) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item, float_places) for item in value]
+    return value
+
+
+class ResultDigest:
+    def __init__(self, ordered:bool=True, float_places:int=None):
+        self.ordered = ordered
+        self.float_places = float_places
+        self.count = 0
+        self._chain = hashlib.sha256()
+        self._sum = 0
+
+    def _encode(self, row)->bytes:
+        return json.dumps(_canonical(row, self.float_places), sort_keys=True, separators=(',', ':'),
+                          default=str).encode()
+
+    def update(self, row):
+        encoded = self._encode(row)
+        if self.ordered:
+            self._chain.update(encoded)
+            self._chain.update(b"\n")
+        else:
+            self._sum = (self._sum + int.from_bytes(hashlib.sha256(encoded).digest(), 'big')) % _MODULUS
+        self.count += 1
+
+    def update_rows(self, rows):
+        for row in rows:
+            self.update(row)
+        return self
+
+    def hexdigest(self)->str:
+        if self.ordered:
+            value = self._chain.hexdigest()
+        else:
+            value = self._sum.to_bytes(32, 'big').hex()
+        return f"{self.count}:{value}"
+
+    def __eq__(self, other):
+        if isinstance(other, ResultDigest):
+            return self.hexdigest() == other.hexdigest()
+        if isinstance(other, str):
+            return self.hexdigest() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ResultDigest({self.hexdigest()})"
+
+
+def digest_rows(rows, ordered:bool=True, float_places:int=None)->str:
+    """
+    Digest of an iterable of rows
+    """
+    return ResultDigest(ordered=ordered, float_places=float_places).update_rows(rows).hexdigest()
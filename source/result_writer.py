@@ -0,0 +1,139 @@
+"""
+Write the results recorded by colorized_test.TimedResult (TEST_TIMINGS) as JUnit XML and JSON
+
+Each test / subTest carries its status (success, failure, error, skipped, timeout, over budget), duration, time budget,
+failure message and the REST requests it made (query, node, HTTP status, response size) - collected while the tests
+run, so no extra queries are issued.
+"""
+import datetime
+import json
+import os
+import xml.etree.ElementTree as ElementTree
+
+STATUSES = ('success', 'over budget', 'failure', 'error', 'timeout', 'skipped')
+
+
+def _split_id(test_id:str)->tuple:
+    """
+    tests.test_sql_queries.TestSQLCommands.test_increments -> (tests.test_sql_queries.TestSQLCommands, test_increments)
+    setUpClass (tests.test_null_data.TestNullData)          -> (tests.test_null_data.TestNullData, setUpClass)
+    """
+    if test_id.endswith(')') and ' (' in test_id:
+        name, class_name = test_id[:-1].split(' (', 1)
+        return class_name, name
+    if '.' not in test_id:
+        return test_id, test_id
+    return tuple(test_id.rsplit('.', 1))
+
+
+def build_results(timings:list)->dict:
+    """
+    Nest the subTests under their test and summarize the run
+    """
+    tests = []
+    subtests = {}
+    for timing in timings:
+        if timing['subtest'] is not None:
+            subtests.setdefault(timing['test'], []).append(timing)
+            continue
+        class_name, name = _split_id(timing['test'])
+        tests.append({
+            'id': timing['test'],
+            'class': class_name,
+            'name': name,
+            'status': timing['status'],
+            'duration': timing['duration'],
+            'budget': timing['budget'],
+            'message': timing['message'],
+            'requests': timing['requests'],
+            'response_bytes': sum(request.get('response_bytes') or 0 for request in timing['requests']),
+            'subtests': [{
+                'name': subtest['subtest'],
+                'status': subtest['status'],
+                'duration': subtest['duration'],
+                'message': subtest['message'],
+                'requests': subtest['requests'],
+                'response_bytes': sum(request.get('response_bytes') or 0 for request in subtest['requests'])
+            } for subtest in subtests.pop(timing['test'], [])]
+        })
+
+    summary = {status: 0 for status in STATUSES}
+    for test in tests:
+        summary[test['status']] = summary.get(test['status'], 0) + 1
+    summary['total'] = len(tests)
+    summary['duration'] = sum(test['duration'] for test in tests)
+
+    return {
+        'generated': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'summary': summary,
+        'tests': tests
+    }
+
+
+def write_json(timings:list, file_path:str):
+    full_path = os.path.expanduser(os.path.expandvars(file_path))
+    try:
+        with open(full_path, 'w') as f:
+            json.dump(build_results(timings), f, indent=2, default=str)
+    except Exception as error:
+        raise Exception(f"Failed to write test results into {file_path} (Error: {error})")
+
+
+def _add_testcase(parent, class_name:str, name:str, result:dict):
+    testcase = ElementTree.SubElement(parent, 'testcase', classname=class_name, name=name, time=f"{result['duration']:.3f}")
+
+    properties = ElementTree.SubElement(testcase, 'properties')
+    ElementTree.SubElement(properties, 'property', name='status', value=result['status'])
+    ElementTree.SubElement(properties, 'property', name='response_bytes', value=str(result['response_bytes']))
+    for request in result['requests']:
+        ElementTree.SubElement(properties, 'property', name='query', value=str(request['command']))
+
+    message = result['message'] or ''
+    if result['status'] == 'failure':
+        ElementTree.SubElement(testcase, 'failure', message=message.strip().splitlines()[-1] if message.strip() else '').text = message
+    elif result['status'] in ('error', 'timeout'):
+        ElementTree.SubElement(testcase, 'error', type=result['status'],
+                               message=message.strip().splitlines()[-1] if message.strip() else '').text = message
+    elif result['status'] == 'skipped':
+        ElementTree.SubElement(testcase, 'skipped', message=message)
+
+
+def write_junit(timings:list, file_path:str):
+    results = build_results(timings)
+    root = ElementTree.Element('testsuites', name='edgecase', time=f"{results['summary']['duration']:.3f}")
+
+    suites = {}
+    for test in results['tests']:
+        if test['class'] not in suites:
+            suites[test['class']] = ElementTree.SubElement(root, 'testsuite', name=test['class'])
+        suite = suites[test['class']]
+        _add_testcase(suite, test['class'], test['name'], test)
+        for subtest in test['subtests']:
+            _add_testcase(suite, test['class'], f"{test['name']} {subtest['name']}", subtest)
+
+    tests = failures = errors = skipped = 0
+    for suite in root:
+        cases = suite.findall('testcase')
+        counts = {
+            'tests': len(cases),
+            'failures': sum(1 for case in cases if case.find('failure') is not None),
+            'errors': sum(1 for case in cases if case.find('error') is not None),
+            'skipped': sum(1 for case in cases if case.find('skipped') is not None)
+        }
+        for key, value in counts.items():
+            suite.set(key, str(value))
+        suite.set('time', f"{sum(float(case.get('time')) for case in cases):.3f}")
+        tests += counts['tests']
+        failures += counts['failures']
+        errors += counts['errors']
+        skipped += counts['skipped']
+    root.set('tests', str(tests))
+    root.set('failures', str(failures))
+    root.set('errors', str(errors))
+    root.set('skipped', str(skipped))
+
+    full_path = os.path.expanduser(os.path.expandvars(file_path))
+    try:
+        ElementTree.ElementTree(root).write(full_path, encoding='utf-8', xml_declaration=True)
+    except Exception as error:
+        raise Exception(f"Failed to write JUnit results into {file_path} (Error: {error})")
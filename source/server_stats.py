@@ -0,0 +1,156 @@
+"""
+Server-side statistics of the suite's queries
+
+With --server-stats, ServerStats (a rest_call sink) keeps the client-measured latency of every format=json sql query
+the tests send - the tests' own queries are left unchanged. Once the tests are done, replay() re-issues a stat=true copy
+of each query, so the response carries the Statistics of that execution next to its rows:
+    {"Query": [...], "Statistics": [{"Count": 1500, "Time": "00:00:00", "Nodes": 2}]}
+- Count: rows returned, Time: query process time (HH:MM:SS), Nodes: operators that took part in the query
+
+The copy is sent to the network and then to every operator of --destinations on its own, so network + harness time can
+be told apart from engine time, and the engine time of each operator from the others.
+"""
+import re
+import threading
+import time
+
+from source import rest_call
+from source.metrics import percentile
+
+_TIME = re.compile(r'^(\d+):(\d{1,2}):(\d{1,2}(?:\.\d+)?)$')
+
+
+def _seconds(value):
+    """
+    Statistics Time value (HH:MM:SS, optionally with a fraction) in seconds - None if it is not in that form
+    """
+    if not isinstance(value, str):
+        return None
+    match = _TIME.match(value.strip())
+    if not match:
+        return None
+    return int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+
+
+def _integer(value):
+    try:
+        return int(str(value).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_statistics(statistics)->dict:
+    """
+    server_time (seconds), server_rows and nodes from a Statistics value - None for whatever is missing
+    """
+    if isinstance(statistics, list):
+        statistics = statistics[0] if statistics and isinstance(statistics[0], dict) else None
+    if not isinstance(statistics, dict):
+        return {'server_time': None, 'server_rows': None, 'nodes': None}
+    return {
+        'server_time': _seconds(statistics.get('Time')),
+        'server_rows': _integer(statistics.get('Count')),
+        'nodes': _integer(statistics.get('Nodes'))
+    }
+
+
+class ServerStats:
+    def __init__(self):
+        self.queries = {}  # command -> {'node', 'client': [latencies of the tests' requests]}
+        self.replays = {}  # command -> {target: {'client', 'error', server_time / server_rows / nodes}}
+        self.results = {}  # command -> summary (see summarize)
+        self.lock = threading.Lock()
+
+    def record(self, event:dict):
+        command = event.get('command')
+        if event.get('method') != 'GET' or event.get('error') or not command or rest_call._with_stat(command) == command:
+            return
+        with self.lock:
+            query = self.queries.setdefault(command, {'node': event.get('node'), 'client': []})
+            query['client'].append(event.get('total') or 0)
+
+    def replay(self, destinations:list=None):
+        """
+        Send a stat=true copy of every recorded query to the network, then to each operator of destinations
+        """
+        with self.lock:
+            queries = dict(self.queries)
+        targets = ['network'] + list(destinations or [])
+        for command, query in queries.items():
+            replays = self.replays.setdefault(command, {})
+            for target in targets:
+                start = time.perf_counter()
+                try:
+                    response = rest_call.get_data(query['node'], rest_call._with_stat(command), destination=target)
+                except Exception as error:
+                    replays[target] = {'client': None, 'error': str(error), **parse_statistics(None)}
+                    continue
+                replays[target] = {'client': time.perf_counter() - start, 'error': None,
+                                   **parse_statistics(rest_call._statistics(response))}
+
+    def summarize(self)->dict:
+        """
+        Median client time of the tests' requests per query, and client / server time of each stat=true replay -
+        overhead is the replay's client time minus its server time
+        """
+        with self.lock:
+            queries = dict(self.queries)
+        for command, query in queries.items():
+            targets = {}
+            for target, replay in self.replays.get(command, {}).items():
+                overhead = None
+                if replay['client'] is not None and replay['server_time'] is not None:
+                    overhead = replay['client'] - replay['server_time']
+                targets[target] = {**replay, 'overhead': overhead}
+            self.results[command] = {
+                'node': query['node'],
+                'client_time': percentile(query['client'], 50),
+                'client_count': len(query['client']),
+                'targets': targets
+            }
+        return self.results
+
+    def attach(self, timings:list):
+        """
+        Add the statistics (of the network replay) to the requests of each test (colorized_test.TEST_TIMINGS)
+        """
+        for timing in timings:
+            for request in timing.get('requests') or []:
+                result = self.results.get(request.get('command'))
+                if result and result['targets'].get('network'):
+                    network = result['targets']['network']
+                    request['server'] = {key: network.get(key) for key in ('server_time', 'server_rows', 'overhead', 'nodes')}
+
+    def report(self)->str:
+        if not self.results:
+            return "No server statistics captured"
+
+        def _ms(value):
+            return "-" if value is None else f"{value * 1000:.1f}"
+
+        def _value(value):
+            return "-" if value is None else str(value)
+
+        header = ['query', 'suite ms', 'target', 'client ms', 'server ms', 'overhead ms', 'rows', 'nodes']
+        rows = []
+        for command, result in sorted(self.results.items(), key=lambda item: -(item[1].get('client_time') or 0)):
+            label = ' '.join(command.split())
+            label = label if len(label) <= 60 else label[:57] + '...'
+            suite_time = _ms(result.get('client_time'))
+            for target, replay in result['targets'].items():
+                if replay['error']:
+                    rows.append([label, suite_time, target, 'failed', '-', '-', '-', '-'])
+                else:
+                    rows.append([label, suite_time, target, _ms(replay['client']), _ms(replay['server_time']),
+                                 _ms(replay['overhead']), _value(replay['server_rows']), _value(replay['nodes'])])
+                label = suite_time = ''
+            if not result['targets']:
+                rows.append([label, suite_time, '-', '-', '-', '-', '-', '-'])
+
+        widths = [max(len(row[index]) for row in rows + [header]) for index in range(len(header))]
+        lines = ["Client vs server (stat=true replay) query time"]
+        lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(header)))
+        lines.append("  ".join("-" * width for width in widths))
+        for row in rows:
+            lines.append("  ".join(value.ljust(widths[index]) for index, value in enumerate(row)))
+        return "\n".join(lines)
@@ -0,0 +1,135 @@
+"""
+Discover test groups in tests/ without importing them.
+
+A test group is a unittest.TestCase class that declares a `group_name` class attribute, for example
+    class TestSQLCommands(unittest.TestCase):
+        group_name = 'sql'
+        group_description = 'Testing related to (basic) data queries'
+        group_aliases = ('basic_sql',)   # optional - other names accepted by --select-test
+        run_by_default = False          # optional - only run when selected with --select-test
+
+Modules are scanned with `ast`, and the resulting listing is cached (keyed by file size / mtime), so only the groups
+that actually run get imported. The suite's original groups keep their original order (GROUP_ORDER); groups discovered
+beyond them run after, in file name order.
+"""
+import ast
+import importlib
+import json
+import os
+
+ROOT_DIR = os.path.dirname(__file__).rsplit('source', 1)[0]
+TESTS_DIR = os.path.join(ROOT_DIR, 'tests')
+CACHE_FILE = os.path.join(TESTS_DIR, '__pycache__', 'test_registry.json')
+GROUP_ORDER = ('anylog', 'blockchain', 'sql', 'timestamp', 'null_data')
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def _scan_module(file_path:str)->list:
+    """
+    Extract the test groups declared in a test module
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=file_path)
+
+    groups = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        attributes = {}
+        tests = []
+        for item in node.body:
+            if isinstance(item, ast.Assign) and len(item.targets) == 1 and isinstance(item.targets[0], ast.Name):
+                attributes[item.targets[0].id] = _literal(item.value)
+            elif isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith('test'):
+                tests.append(item.name)
+        if attributes.get('group_name'):
+            groups.append({
+                'name': attributes['group_name'],
+                'description': attributes.get('group_description') or f"Testing related to {attributes['group_name']}",
+                'aliases': list(attributes.get('group_aliases') or []),
+                'run_by_default': attributes.get('run_by_default', True) is not False,
+                'module': f"tests.{os.path.splitext(os.path.basename(file_path))[0]}",
+                'class': node.name,
+                'tests': sorted(tests)
+            })
+    return groups
+
+
+def _read_cache()->dict:
+    try:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _write_cache(content:dict):
+    try:
+        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+        with open(CACHE_FILE, 'w') as f:
+            json.dump(content, f)
+    except Exception:
+        pass  # the cache is an optimization only
+
+
+def discover(tests_dir:str=TESTS_DIR)->dict:
+    """
+    group name -> group info (module, class, description, aliases, run_by_default, tests) - GROUP_ORDER groups first,
+    then the others in file name order
+    """
+    cache = _read_cache()
+    updated = {}
+    groups = {}
+    for fname in sorted(os.listdir(tests_dir)):
+        if not (fname.startswith('test') and fname.endswith('.py')):
+            continue
+        file_path = os.path.join(tests_dir, fname)
+        stat = os.stat(file_path)
+        key = f"{stat.st_size}:{stat.st_mtime_ns}"
+        if cache.get(fname, {}).get('key') == key:
+            module_groups = cache[fname]['groups']
+        else:
+            module_groups = _scan_module(file_path)
+        updated[fname] = {'key': key, 'groups': module_groups}
+        for group in module_groups:
+            groups[group['name']] = group
+
+    if updated != cache:
+        _write_cache(updated)
+    order = {name: index for index, name in enumerate(GROUP_ORDER)}
+    return dict(sorted(groups.items(), key=lambda item: order.get(item[0], len(order))))
+
+
+def resolve(name:str, groups:dict)->str:
+    """
+    Map a group name or alias to the group name (None if unknown)
+    """
+    if name in groups:
+        return name
+    for group_name, group in groups.items():
+        if name in group['aliases']:
+            return group_name
+    return None
+
+
+def load(group:dict):
+    """
+    Import the module of a group and return its TestCase class
+    """
+    module = importlib.import_module(group['module'])
+    return getattr(module, group['class'])
+
+
+def configure(test_class, settings:dict):
+    """
+    Set the class-level connection params a TestCase declares (ex. conn, query, operator, db_name)
+    """
+    for key, value in settings.items():
+        if hasattr(test_class, key):
+            setattr(test_class, key, value)
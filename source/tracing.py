@@ -0,0 +1,108 @@
+"""
+Record a timeline of the suite run in Chrome Trace Event format (open with chrome://tracing or https://ui.perfetto.dev)
+
+Spans are recorded for run phases, ingest threads, REST requests (as a rest_call sink), tests / subTests and idle
+sleeps. All helpers are no-ops unless `start()` was called.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACER = None
+
+
+class Tracer:
+    def __init__(self):
+        self.origin = time.time()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = {}
+        self.lock = threading.Lock()
+
+    def _thread(self)->int:
+        thread = threading.current_thread()
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = thread.name
+        return tid
+
+    def complete(self, name:str, category:str, start:float, end:float, args:dict=None):
+        """
+        Add a span - start / end are epoch seconds (time.time())
+        """
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': self._thread(),
+                 'ts': round((start - self.origin) * 1e6, 3), 'dur': round(max(0.0, end - start) * 1e6, 3)}
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+
+    def counter(self, name:str, values:dict):
+        event = {'name': name, 'ph': 'C', 'pid': self.pid, 'ts': round((time.time() - self.origin) * 1e6, 3), 'args': values}
+        with self.lock:
+            self.events.append(event)
+
+    def record(self, event:dict):
+        """
+        rest_call sink - one span per request
+        """
+        self.complete(name=event.get('label') or event.get('method'), category='request', start=event['start'],
+                      end=event['start'] + (event.get('total') or 0),
+                      args={key: event.get(key) for key in ('node', 'method', 'command', 'status', 'error', 'dns',
+                                                            'connect', 'ttfb', 'request_bytes', 'response_bytes')})
+
+    def write(self, file_path:str):
+        full_path = os.path.expanduser(os.path.expandvars(file_path))
+        with self.lock:
+            events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'edgecase_suite'}}]
+            events += [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                       for tid, name in self.threads.items()]
+            events += self.events
+        try:
+            with open(full_path, 'w') as f:
+                json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        except Exception as error:
+            raise Exception(f"Failed to write trace into {file_path} (Error: {error})")
+
+
+def start()->Tracer:
+    global TRACER
+    TRACER = Tracer()
+    return TRACER
+
+
+def stop():
+    global TRACER
+    TRACER = None
+
+
+@contextmanager
+def span(name:str, category:str='phase', **args):
+    if TRACER is None:
+        yield
+        return
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        TRACER.complete(name=name, category=category, start=start_time, end=time.time(), args=args or None)
+
+
+def complete(name:str, category:str, start:float, end:float, **args):
+    if TRACER is not None:
+        TRACER.complete(name=name, category=category, start=start, end=end, args=args or None)
+
+
+def counter(name:str, **values):
+    if TRACER is not None:
+        TRACER.counter(name=name, values=values)
+
+
+def sleep(seconds:float, reason:str='sleep'):
+    """
+    time.sleep that shows up as an idle span in the trace
+    """
+    with span(reason, category='sleep', seconds=seconds):
+        time.sleep(seconds)
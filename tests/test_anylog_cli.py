@@ -28,6 +28,9 @@ DATA_TYPES_EQUIVALENTS = {
 
 
 class TestAnyLogCommands(unittest.TestCase):
+    group_name = 'anylog'
+    group_description = 'Testing related to Node status and configuration'
+
     # Class variables to be set before running tests
     query = None
     operator = None
@@ -8,6 +8,9 @@ from contextlib import contextmanager
 
 
 class TestBlockchainPolicies(unittest.TestCase):
+    group_name = 'blockchain'
+    group_description = 'Testing related to blockchain policy params and relationships'
+
     # Class variables to be set before running tests
     query = None
     is_standalone = True  # Node is a standalone instance (master, operator and query in 1 container)
@@ -1,4 +1,4 @@
-""""
+"""
 :requirements:
     - 1 query
     - 2 or more operators on the same cluster
@@ -14,4 +14,123 @@
 :complex:
     - if main has (a subset of data) and "backup" has more and we query from more, what happens?
     - if a (main) operator is killed data still returned
-"""
\ No newline at end of file
+
+The operators' TCP connections are passed with `--destinations` (comma separated IP:port), and the group only runs
+when selected - `--select-test resiliency`. Each query is sent to all operators concurrently (one `destination` per
+request), and the results are compared by a canonical hash (floats rounded to `float_places`, so an avg() summed in
+another order still matches). The diverging operators are only named against a majority when there are 3 or more
+destinations and more than half of them agree - otherwise every result is listed.
+"""
+import concurrent.futures
+import time
+import unittest
+
+from source.rest_call import get_data_stream, with_deadline
+from source.result_digest import ResultDigest
+from contextlib import contextmanager
+
+
+class TestDataResiliency(unittest.TestCase):
+    group_name = 'resiliency'
+    group_description = 'Testing related to data consistency across operators in a cluster'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    query = None
+    db_name = None
+    destinations = None  # operator TCP IP:port values
+    float_places = 6  # decimals floats are rounded to before hashing
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.query
+        assert cls.db_name
+        if not cls.destinations or len(cls.destinations) < 2:
+            raise unittest.SkipTest("requires 2 or more operator TCP connections (--destinations)")
+
+    def setUp(self):
+        self.query_base = f"sql {self.db_name} format=json and stat=false and timezone=utc"
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _query_operator(self, query:str, destination:str)->dict:
+        start = time.perf_counter()
+        digest = ResultDigest(float_places=self.float_places)
+        try:
+            for row in get_data_stream(conn=self.query, query=query, destination=destination):
+                digest.update(row)
+        except Exception as error:
+            return {'destination': destination, 'duration': time.perf_counter() - start, 'error': str(error)}
+        return {'destination': destination, 'duration': time.perf_counter() - start, 'rows': digest.count,
+                'digest': digest.hexdigest(), 'error': None}
+
+    def _compare_operators(self, query:str):
+        """
+        Send query to every operator concurrently and assert all of them return the same result
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.destinations)) as executor:
+            results = list(executor.map(with_deadline(lambda destination: self._query_operator(query, destination)), self.destinations))
+
+        for result in results:
+            if result['error']:
+                print(f"\t{result['destination']:<22} {result['duration'] * 1000:9.1f} ms  failed")
+            else:
+                print(f"\t{result['destination']:<22} {result['duration'] * 1000:9.1f} ms  {result['rows']:>7} rows  {result['digest'].split(':')[-1][:16]}")
+
+        failed = [f"{result['destination']} ({result['error']})" for result in results if result['error']]
+        if failed:
+            with self.query_context(query):
+                self.fail(f"operator(s) {', '.join(failed)} failed")
+
+        groups = {}
+        for result in results:
+            groups.setdefault(result['digest'], []).append(result['destination'])
+        if len(groups) > 1:
+            majority = max(groups.values(), key=len)
+            with self.query_context(query):
+                if len(results) >= 3 and len(majority) * 2 > len(results):
+                    diverging = [f"{result['destination']} ({result['rows']} rows)" for result in results if result['destination'] not in majority]
+                    self.fail(f"operator(s) {', '.join(diverging)} diverge from {', '.join(majority)}")
+                listed = [f"{result['destination']} ({result['rows']} rows, {result['digest'].split(':')[-1][:16]})" for result in results]
+                self.fail(f"operators disagree, no majority: {', '.join(listed)}")
+
+    def test_min_max_count(self):
+        for table in ['rand_data', 'power_plant', 'power_plant_pv']:
+            with self.subTest(table=table):
+                self._compare_operators(f"{self.query_base} SELECT min(timestamp), max(timestamp), count(*) FROM {table}")
+
+    def test_value_aggregations(self):
+        query = f"{self.query_base} SELECT min(timestamp), max(timestamp), min(value), max(value), avg(value) FROM rand_data"
+        self._compare_operators(query)
+
+    def test_group_by(self):
+        query = (f"{self.query_base} SELECT monitor_id, min(timestamp), max(timestamp), min(a_current), max(a_current), "
+                 f"avg(a_current) FROM power_plant GROUP BY monitor_id ORDER BY monitor_id")
+        self._compare_operators(query)
+
+    def test_increments(self):
+        for increment in ['day, 1', 'day, 30', 'year, 1']:
+            with self.subTest(increment=increment):
+                query = (f"{self.query_base} SELECT increments({increment}, timestamp), min(timestamp) as min_ts, "
+                         f"max(timestamp) as max_ts, min(value), avg(value), max(value) FROM rand_data ORDER BY min_ts")
+                self._compare_operators(query)
+
+    def test_period(self):
+        for period in ['hour, 12, "2026-01-01 00:00:00"', 'day, 30, "2024-02-15 20:18:29"']:
+            with self.subTest(period=period):
+                query = f"{self.query_base} SELECT timestamp, pv FROM power_plant_pv WHERE period({period}, timestamp) ORDER BY timestamp DESC"
+                self._compare_operators(query)
+
+
+if __name__ == '__main__':
+    TestDataResiliency.query = '127.0.0.1:32349'
+    TestDataResiliency.db_name = 'new_company'
+    TestDataResiliency.destinations = ['127.0.0.1:32148', '127.0.0.1:32158']
+    unittest.main(verbosity=2)
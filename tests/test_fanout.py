@@ -0,0 +1,154 @@
+"""
+Query fan-out across many tables
+- create 200 tables with the rand_data schema (fanout_000 ... fanout_199) through the ingest path (put_data), each
+  with a different number of rows - tables already holding their rows (an earlier run) are not inserted again. The
+  tables go into a database of their own ([db_name]_fanout), so the suite's database is left as it is
+- for 1, 10, 50 and 200 tables
+    -> SELECT count(*) with include=(...) - total row count
+    -> SELECT count(*) with include=(...) and extend=(@table_name) - row count per table
+- report the query time per fan-out, so the cost of adding tables to a query can be followed
+
+The group only runs when selected - `--select-test fanout` - as it creates tables in the database.
+"""
+import concurrent.futures
+import time
+import unittest
+
+from source import dataset
+from source.ingest_fingerprint import declared_tables
+from source.rest_call import connect_dbms, flush_buffer, get_data, put_data, with_deadline
+from source import tracing
+from contextlib import contextmanager
+
+TABLE_PREFIX = 'fanout'
+DB_SUFFIX = 'fanout'
+
+
+def _table(index:int)->str:
+    return f"{TABLE_PREFIX}_{index:03d}"
+
+
+class TestFanout(unittest.TestCase):
+    group_name = 'fanout'
+    group_description = 'Testing related to include / extend queries over a growing number of tables'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    operator = None
+    db_name = None
+    fanout_db = None  # database of the fan-out tables - [db_name]_fanout when not set
+    fan_outs = (1, 10, 50, 200)
+    workers = 16  # concurrent row count queries
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.operator
+        assert cls.db_name
+        cls.fanout_db = cls.fanout_db or f"{cls.db_name}_{DB_SUFFIX}"
+        connect_dbms(conn=cls.operator, dbms=cls.fanout_db)
+
+        source = dataset.load_table('rand_data')
+        cls.expected = {}
+        rows = {}
+        for index in range(max(cls.fan_outs)):
+            start = index * 7 % len(source)
+            rows[_table(index)] = source.slice(start, start + 5 + index % 5)
+            cls.expected[_table(index)] = len(rows[_table(index)])
+
+        # tables left by an earlier run are reused - only missing (empty) ones are inserted
+        current = cls._table_counts()
+        mismatched = {table: count for table, count in current.items() if count and count != cls.expected.get(table)}
+        if mismatched:
+            raise Exception(f"Failed to prepare fan-out tables (Error: unexpected row counts {mismatched})")
+        missing = [table for table in cls.expected if not current.get(table)]
+
+        if missing:
+            with tracing.span("create fan-out tables", category='ingest', tables=len(missing)):
+                for index, table in enumerate(missing):
+                    put_data(conn=cls.operator[index % len(cls.operator)], payload=rows[table].serialize(),
+                             dbms=cls.fanout_db, table=table)
+                flush_buffer(conn=cls.operator)
+
+            # wait for every table to be queryable
+            for _ in range(10):
+                if cls._table_counts() == cls.expected:
+                    break
+                tracing.sleep(5, reason='wait for fan-out tables')
+            else:
+                raise Exception("Failed to prepare fan-out tables (Error: row counts do not match after 50s)")
+
+    @classmethod
+    def _table_counts(cls)->dict:
+        """
+        table -> row count of the fan-out tables that exist - the declared tables are queried concurrently (include
+        stops at missing ones), and a failed query raises rather than reading as a missing table
+        """
+        declared = declared_tables(cls.conn, cls.fanout_db)
+        tables = [_table(index) for index in range(max(cls.fan_outs))]
+
+        def _count(table:str)->int:
+            if table not in declared:
+                return 0
+            query = f'sql {cls.fanout_db} format=json and stat=false "SELECT COUNT(*) AS row_count FROM {table};"'
+            try:
+                return get_data(cls.conn, query).json()['Query'][0]['row_count']
+            except Exception as error:
+                raise Exception(f"Failed to count the rows of {cls.fanout_db}.{table} (Error: {error})")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=cls.workers) as executor:
+            return dict(zip(tables, executor.map(with_deadline(_count), tables)))
+
+    @classmethod
+    def _count_query(cls, tables:int, extend:bool=False)->str:
+        include = f" and include=({', '.join(_table(index) for index in range(1, tables))})" if tables > 1 else ""
+        extend = " and extend=(@table_name)" if extend else ""
+        return (f'sql {cls.fanout_db} format=json and stat=false{include}{extend} '
+                f'"SELECT COUNT(*) AS row_count FROM {_table(0)};"')
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _timed_query(self, query:str)->tuple:
+        start = time.perf_counter()
+        data = get_data(self.conn, query).json()
+        return data, time.perf_counter() - start
+
+    def test_include(self):
+        for tables in self.fan_outs:
+            with self.subTest(tables=tables):
+                query = self._count_query(tables)
+                data, duration = self._timed_query(query)
+                print(f"\tinclude  {tables:>4} table(s)  {duration * 1000:9.1f} ms")
+
+                with self.query_context(query):
+                    self.assertIn("Query", data)
+                    expected = sum(self.expected[_table(index)] for index in range(tables))
+                    self.assertEqual(data['Query'][0]['row_count'], expected)
+
+    def test_extend(self):
+        for tables in self.fan_outs:
+            with self.subTest(tables=tables):
+                query = self._count_query(tables, extend=True)
+                data, duration = self._timed_query(query)
+                print(f"\textend   {tables:>4} table(s)  {duration * 1000:9.1f} ms")
+
+                with self.query_context(query):
+                    self.assertIn("Query", data)
+                    actual = {row.get('table_name'): row.get('row_count') for row in data['Query']}
+                    expected = {_table(index): self.expected[_table(index)] for index in range(tables)}
+                    self.assertEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    TestFanout.conn = '127.0.0.1:32349'
+    TestFanout.operator = ['127.0.0.1:32149']
+    TestFanout.db_name = 'new_company'
+    unittest.main(verbosity=2)
@@ -0,0 +1,163 @@
+"""
+GROUP BY over a growing number of distinct monitor ids
+- generate (seeded) power_plant like rows for 10k, 100k and 1M distinct monitor ids, 2 rows per id, and insert them
+  through put_data into cardinality_[n] - skipped when the table already holds the expected row count
+- per cardinality, the `min / max / count GROUP BY monitor_id` query of test_aggregations_group_by
+    -> the digest of the streamed result == the digest of the min / max / count computed locally while generating
+- report latency, time to first byte, response size and the client memory peak while the result is consumed (rows are
+  parsed while streaming, so the peak should stay flat as the cardinality grows)
+
+The group only runs when selected - `--select-test cardinality` - as it creates (large) tables in the database.
+"""
+import array
+import time
+import tracemalloc
+import unittest
+
+from source import data_generator
+from source.ingest_fingerprint import remote_row_count
+from source.rest_call import flush_buffer, get_data, get_data_stream
+from source.result_digest import ResultDigest
+from source import tracing
+from contextlib import contextmanager
+
+TABLE_PREFIX = 'cardinality'
+ROWS_PER_ID = 2
+
+
+def _table(cardinality:int)->str:
+    return f"{TABLE_PREFIX}_{cardinality}"
+
+
+class _Expected:
+    """
+    min / max timestamp (seconds since data_generator.START) and row count per monitor index
+    """
+    def __init__(self, cardinality:int):
+        self.min_ts = array.array('q', [data_generator.SECONDS] * cardinality)
+        self.max_ts = array.array('q', [-1] * cardinality)
+        self.counts = array.array('l', [0] * cardinality)
+
+    def update(self, batch:list):
+        for row in batch:
+            index, offset = row['_id'], row['_offset']
+            self.min_ts[index] = min(self.min_ts[index], offset)
+            self.max_ts[index] = max(self.max_ts[index], offset)
+            self.counts[index] += 1
+
+    def digest(self)->ResultDigest:
+        digest = ResultDigest(ordered=False)
+        for index, count in enumerate(self.counts):
+            if count:
+                digest.update({'monitor_id': data_generator.monitor_id(index),
+                               'min_ts': data_generator.timestamp(self.min_ts[index])[:19],
+                               'max_ts': data_generator.timestamp(self.max_ts[index])[:19],
+                               'row_count': count})
+        return digest
+
+
+class TestHighCardinality(unittest.TestCase):
+    group_name = 'cardinality'
+    group_description = 'Testing related to GROUP BY latency / memory as the number of distinct monitor ids grows'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    operator = None
+    db_name = None
+    cardinalities = (10000, 100000, 1000000)
+    batch_size = 5000
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.operator
+        assert cls.db_name
+
+        cls.expected = {}
+        for cardinality in cls.cardinalities:
+            table = _table(cardinality)
+            expected = _Expected(cardinality)
+            rows = data_generator.high_cardinality_rows(cardinality, rows_per_id=ROWS_PER_ID, seed=cardinality)
+            # a query error raises - only an empty / missing table is loaded, a partial one can't be topped up
+            count = remote_row_count(cls.conn, cls.db_name, table)
+            if count == cardinality * ROWS_PER_ID:
+                for batch in data_generator.batches(rows, cls.batch_size):
+                    expected.update(batch)
+            elif count:
+                raise Exception(f"Failed to prepare {table} (Error: it holds {count} of {cardinality * ROWS_PER_ID} rows - drop it to load it again)")
+            else:
+                data_generator.ingest(conns=cls.operator, db_name=cls.db_name, table=table, rows=rows,
+                                      batch_size=cls.batch_size, on_batch=expected.update)
+                flush_buffer(conn=cls.operator)
+                for _ in range(30):
+                    if cls._row_count(table) == cardinality * ROWS_PER_ID:
+                        break
+                    tracing.sleep(5, reason=f'wait for {table}')
+                else:
+                    raise Exception(f"Failed to prepare {table} (Error: {cls._row_count(table)} of {cardinality * ROWS_PER_ID} rows queryable)")
+            cls.expected[cardinality] = expected.digest()
+
+    @classmethod
+    def _row_count(cls, table:str):
+        try:
+            query = f'sql {cls.db_name} format=json and stat=false "SELECT COUNT(*) AS row_count FROM {table}"'
+            return get_data(cls.conn, query).json()['Query'][0]['row_count']
+        except Exception:
+            return None
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    @contextmanager
+    def _memory_peak(self, result:dict):
+        """
+        Peak (python) memory allocated while the block runs - tracemalloc is left running if it already was (--profile)
+        """
+        tracing_before = tracemalloc.is_tracing()
+        if not tracing_before:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        try:
+            yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            result['peak'] = peak - baseline
+            if not tracing_before:
+                tracemalloc.stop()
+
+    def test_group_by(self):
+        for cardinality in self.cardinalities:
+            with self.subTest(cardinality=cardinality):
+                query = (f'sql {self.db_name} format=json and stat=false and timezone=utc "SELECT monitor_id, '
+                         f'min(timestamp)::ljust(19) as min_ts, max(timestamp)::ljust(19) as max_ts, count(*) as row_count '
+                         f'FROM {_table(cardinality)} GROUP BY monitor_id"')
+
+                stats = {}
+                memory = {}
+                digest = ResultDigest(ordered=False)
+                start = time.perf_counter()
+                with self._memory_peak(memory):
+                    for row in get_data_stream(self.conn, query, stats=stats):
+                        digest.update({key: row.get(key) for key in ('monitor_id', 'min_ts', 'max_ts', 'row_count')})
+                duration = time.perf_counter() - start
+                print(f"\t{cardinality:>8} ids  {duration * 1000:10.1f} ms  first byte {(stats.get('first_chunk') or 0) * 1000:8.1f} ms  "
+                      f"{stats.get('response_bytes', 0) / 1024 / 1024:8.2f} MB  peak {memory['peak'] / 1024 / 1024:7.2f} MB")
+
+                with self.query_context(query):
+                    self.assertEqual(digest.count, self.expected[cardinality].count)
+                    self.assertEqual(digest.hexdigest(), self.expected[cardinality].hexdigest())
+
+
+if __name__ == '__main__':
+    TestHighCardinality.conn = '127.0.0.1:32349'
+    TestHighCardinality.operator = ['127.0.0.1:32149']
+    TestHighCardinality.db_name = 'new_company'
+    unittest.main(verbosity=2)
@@ -0,0 +1,179 @@
+"""
+Retrieval throughput for large raw-row results
+- large_results - 1M generated (data_generator.high_cardinality_rows) rows, inserted through put_data when the table
+  is empty - a partial table fails (the data/ tables hold at most 1500 rows, so every LIMIT would return the same rows)
+- SELECT * FROM large_results LIMIT 10k, 100k, 1M
+- format=json (rows parsed while streaming) and format=table (lines counted while streaming)
+- report rows/sec, MB/sec and time to first byte per query
+- validate completeness
+    -> row count == min(limit, count(*))
+    -> when the whole table is retrieved, the digest of the rows matches the digest of the generated rows
+
+The group only runs when selected - `--select-test throughput` - as the 1M row queries take a while on scaled data.
+"""
+import unittest
+
+from source import data_generator
+from source import dataset
+from source import tracing
+from source.ingest_fingerprint import remote_row_count
+from source.rest_call import flush_buffer, get_data, get_data_stream, get_text_stream
+from source.result_digest import ResultDigest
+from contextlib import contextmanager
+
+FLOAT_PLACES = 6
+TABLE = 'large_results'
+CARDINALITY = 100000  # monitor ids
+ROWS_PER_ID = 10
+COLUMNS = {'monitor_id': 'string', 'timestamp': 'timestamp', 'a_current': 'int', 'b_current': 'int', 'c_current': 'int'}
+
+
+def generated_rows():
+    return data_generator.high_cardinality_rows(CARDINALITY, rows_per_id=ROWS_PER_ID, seed=0)
+
+
+def _row_count(conn:str, db_name:str):
+    try:
+        query = f"sql {db_name} format=json and stat=false SELECT count(*) AS row_count FROM {TABLE}"
+        return get_data(conn, query).json()['Query'][0]['row_count']
+    except Exception:
+        return None
+
+
+def prepare_table(conn:str, operator:list, db_name:str, batch_size:int=5000)->int:
+    """
+    Insert the generated rows into large_results when it is missing / empty - a query error or a partial table raises
+    (also used by test_window_sweep)
+    :return:
+        rows in the table
+    """
+    expected = CARDINALITY * ROWS_PER_ID
+    current = remote_row_count(conn, db_name, TABLE)
+    if current == expected:
+        return current
+    if current:
+        raise Exception(f"Failed to prepare {TABLE} (Error: it holds {current} of {expected} rows - drop it to load it again)")
+    data_generator.ingest(conns=operator, db_name=db_name, table=TABLE, rows=generated_rows(), batch_size=batch_size)
+    flush_buffer(conn=operator)
+    for _ in range(60):
+        if _row_count(conn, db_name) == expected:
+            return expected
+        tracing.sleep(5, reason=f'wait for {TABLE}')
+    raise Exception(f"Failed to prepare {TABLE} (Error: {_row_count(conn, db_name)} of {expected} rows queryable)")
+
+
+def _canonical_row(row:dict, columns:dict)->dict:
+    """
+    Reduce a row to the local dataset's columns (AnyLog lowercases column names and adds row_id, tsd_name etc.)
+    """
+    values = {key.lower(): value for key, value in row.items()}
+    canonical = {}
+    for column, kind in columns.items():
+        value = values.get(column)
+        if value is None:
+            canonical[column] = None
+        elif kind == 'timestamp':
+            canonical[column] = dataset.timestamp_to_micros(str(value))
+        elif kind in ('int', 'float') and not isinstance(value, bool):
+            canonical[column] = float(value)
+        else:
+            canonical[column] = str(value).lower()
+    return canonical
+
+
+class TestLargeResults(unittest.TestCase):
+    group_name = 'throughput'
+    group_description = 'Testing related to large result retrieval throughput'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    operator = None
+    db_name = None
+    limits = (10000, 100000, 1000000)
+    batch_size = 5000
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.operator
+        assert cls.db_name
+
+        cls.row_count = prepare_table(cls.conn, cls.operator, cls.db_name, batch_size=cls.batch_size)
+
+    def setUp(self):
+        self.query_base = f"sql {self.db_name} stat=false and timezone=utc"
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _report(self, table:str, output_format:str, limit:int, rows:int, stats:dict):
+        total = stats.get('total') or 0
+        rate = rows / total if total else 0
+        throughput = stats.get('response_bytes', 0) / total / 1024 / 1024 if total else 0
+        first_chunk = (stats.get('first_chunk') or 0) * 1000
+        print(f"\t{table:<12} {output_format:<5} LIMIT {limit:<8} {rows:>8} rows  {total:8.2f} s  "
+              f"{rate:12,.0f} rows/s  {throughput:8.2f} MB/s  first byte {first_chunk:8.1f} ms")
+
+    @staticmethod
+    def _local_digest():
+        digest = ResultDigest(ordered=False, float_places=FLOAT_PLACES)
+        for row in generated_rows():
+            digest.update(_canonical_row(row, COLUMNS))
+        return digest
+
+    def test_json_rows(self):
+        local_digest = None
+        for limit in self.limits:
+            with self.subTest(table=TABLE, limit=limit):
+                query = f"{self.query_base} and format=json SELECT * FROM {TABLE} LIMIT {limit}"
+                expected_rows = min(limit, self.row_count)
+                compare = expected_rows == self.row_count
+                if compare and local_digest is None:
+                    local_digest = self._local_digest()
+
+                stats = {}
+                rows = 0
+                digest = ResultDigest(ordered=False, float_places=FLOAT_PLACES)
+                for row in get_data_stream(self.conn, query, stats=stats):
+                    rows += 1
+                    if compare:
+                        digest.update(_canonical_row(row, COLUMNS))
+                self._report(TABLE, 'json', limit, rows, stats)
+
+                with self.query_context(query):
+                    self.assertEqual(rows, expected_rows)
+                    if compare:
+                        self.assertEqual(digest.hexdigest(), local_digest.hexdigest())
+
+    def test_table_rows(self):
+        for limit in self.limits:
+            with self.subTest(table=TABLE, limit=limit):
+                query = f"{self.query_base} and format=table SELECT * FROM {TABLE} LIMIT {limit}"
+                expected_rows = min(limit, self.row_count)
+
+                stats = {}
+                rows = 0
+                header_done = False
+                for line in get_text_stream(self.conn, query, stats=stats):
+                    if not header_done:
+                        header_done = line.startswith('-')  # column names, then a ---- separator line
+                    elif line.strip():
+                        rows += 1
+                self._report(TABLE, 'table', limit, rows, stats)
+
+                with self.query_context(query):
+                    self.assertEqual(rows, expected_rows)
+
+
+if __name__ == '__main__':
+    TestLargeResults.conn = '127.0.0.1:32349'
+    TestLargeResults.operator = ['127.0.0.1:32149']
+    TestLargeResults.db_name = 'new_company'
+    unittest.main(verbosity=2)
@@ -1,9 +1,16 @@
+import time
 import unittest
 import source.rest_call as rest_call
+from source.insert_data_null import insert_scaled
+from source import tracing
 from contextlib import contextmanager
 
 
 class TestNullData(unittest.TestCase):
+    group_name = 'null_data'
+    group_description = 'Testing related to Null or Empty data'
+    group_aliases = ('null',)
+
     # Class variables to be set before running tests
     query = None
     db_name = None
@@ -123,6 +130,101 @@ class TestNullData(unittest.TestCase):
                 {'acct': 'Don', 'value1': 3, 'value2': 3}]
             )
 
+
+class TestNullDataScaled(unittest.TestCase):
+    """
+    TestNullData aggregations against generated rows (insert_data_null.generate_rows) - millions of rows with a
+    configurable null / missing-key ratio per column, expected values derived locally, latency printed per query
+    """
+    group_name = 'null_data_scaled'
+    group_description = 'Testing related to Null or Empty data at scale'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    query = None
+    operator = None
+    db_name = None
+    table = 't1_scaled'
+    rows = 1000000
+    ratios = None  # column -> (null ratio, missing-key ratio), insert_data_null.RATIOS when None
+
+    @classmethod
+    def setUpClass(cls):
+        # Ensure required parameters are set
+        assert cls.query
+        assert cls.operator
+        assert cls.db_name
+
+        # a partially loaded table can't be topped up (which rows made it in is unknown) - re-sending it would add duplicates
+        count = cls._row_count() or 0
+        if count and count != cls.rows:
+            raise Exception(f"Failed to prepare {cls.table} (Error: it holds {count} of {cls.rows} rows - drop it to load it again)")
+        cls.expected = insert_scaled(conns=cls.operator, db_name=cls.db_name, rows=cls.rows, table=cls.table,
+                                     ratios=cls.ratios, ingest=not count)
+        for _ in range(30):
+            if cls._row_count() == cls.rows:
+                break
+            tracing.sleep(5, reason=f'wait for {cls.table}')
+        else:
+            raise Exception(f"Failed to prepare {cls.table} (Error: {cls._row_count()} of {cls.rows} rows queryable)")
+
+    @classmethod
+    def _row_count(cls):
+        try:
+            query = f"sql {cls.db_name} format=json and stat=false select count(*) as row_count from {cls.table}"
+            return rest_call.get_data(conn=cls.query, query=query, destination="network").json()['Query'][0]['row_count']
+        except Exception:
+            return None
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _timed_query(self, select:str)->tuple:
+        query = f"sql {self.db_name} format=json and stat=false {select}"
+        start = time.perf_counter()
+        data = rest_call.get_data(conn=self.query, query=query, destination="network").json()
+        print(f"\t{select:<90} {(time.perf_counter() - start) * 1000:9.1f} ms")
+        return query, data
+
+    def test_row_count(self):
+        query, data = self._timed_query(f"select count(*) as row_count from {self.table}")
+        with self.query_context(query):
+            self.assertIn('Query', data)
+            self.assertEqual(data['Query'][0].get("row_count"), self.expected.rows)
+
+    def test_values_count(self):
+        query, data = self._timed_query(f"select count(acct) as acct, count(value1) as value1, count(value2) as value2 from {self.table}")
+        with self.query_context(query):
+            self.assertIn('Query', data)
+            self.assertEqual(data['Query'][0], {column: self.expected.count(column) for column in ('acct', 'value1', 'value2')})
+
+    def test_avg_values(self):
+        query, data = self._timed_query(f"select avg(value1) as value1, avg(value2) as value2 from {self.table}")
+        with self.query_context(query):
+            self.assertIn('Query', data)
+            for column in ('value1', 'value2'):
+                self.assertAlmostEqual(data['Query'][0].get(column), self.expected.avg(column), places=4)
+
+    def test_is_null(self):
+        for column in ('acct', 'value2'):
+            with self.subTest(column=column):
+                query, data = self._timed_query(f"select count(*) as row_count from {self.table} where {column} IS NULL")
+                with self.query_context(query):
+                    self.assertIn('Query', data)
+                    self.assertEqual(data['Query'][0].get("row_count"), self.expected.nulls(column))
+
+                query, data = self._timed_query(f"select count(*) as row_count from {self.table} where {column} IS NOT NULL")
+                with self.query_context(query):
+                    self.assertIn('Query', data)
+                    self.assertEqual(data['Query'][0].get("row_count"), self.expected.count(column))
+
+
 if __name__ == '__main__':
     # insert_data(conn='10.0.0.169:32149', db_name='new_company')
     # Set class variables dynamically
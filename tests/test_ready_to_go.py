@@ -1,9 +1,9 @@
 import unittest
-import time
 from contextlib import contextmanager
 from unittest import skipIf
 
 from source.rest_call import execute_request, get_data
+from source import tracing
 
 
 class TestQueryDataReady(unittest.TestCase):
@@ -72,7 +72,7 @@ class TestQueryDataReady(unittest.TestCase):
             row_count = int(result.json()['Query'][0]['row_count'])
             if row_count == expected_row_count:
                 break
-            time.sleep(30)
+            tracing.sleep(30, reason='wait for row count')
 
         if row_count != expected_row_count:
             TestQueryDataReady.testing_ready = False
@@ -0,0 +1,52 @@
+"""
+Offline checks of how responses are parsed - no AnyLog node is needed, so these are not a suite test group (they run
+with `python -m pytest tests/test_response_parsing.py` or `python -m unittest tests.test_response_parsing`)
+"""
+import json
+import unittest
+
+from source.rest_call import iter_query_rows
+from source.server_stats import parse_statistics
+
+# Statistics of a stat=true format=json response, as documented for AnyLog queries
+STATISTICS_FIXTURE = {
+    "Query": [{"row_count": 1500}],
+    "Statistics": [{"Count": 1, "Time": "00:00:01.25", "Nodes": 2}]
+}
+
+
+def _chunks(body:str, size:int):
+    data = body.encode()
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+
+class TestQueryRows(unittest.TestCase):
+    def test_rows_every_chunk_size(self):
+        rows = [{'value': 4.5, 'name': 'é'}, 7, -1.25e-3, 'text, with ] and ,', True, None, [1, 2.5], 100000, {}]
+        body = json.dumps({'Query': rows, 'Statistics': [{'Count': len(rows)}]})
+        for size in range(1, len(body) + 1):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(list(iter_query_rows(_chunks(body, size))), rows)
+
+    def test_number_split_across_chunks(self):
+        self.assertEqual(list(iter_query_rows([b'{"Query": [4', b'.5, 1', b'2', b'e', b'3]}'])), [4.5, 12e3])
+        self.assertEqual(list(iter_query_rows([b'{"Query": [4.', b'5 ', b']}'])), [4.5])
+        self.assertEqual(list(iter_query_rows([b'{"Query": [-', b'3]}'])), [-3])
+
+    def test_not_a_query(self):
+        self.assertEqual(list(iter_query_rows([b'{"Message": ', b'"no data"}'])), [])
+
+    def test_incomplete_body(self):
+        with self.assertRaises(Exception):
+            list(iter_query_rows([b'{"Query": [{"a": 1}, {"b"']))
+
+
+class TestStatistics(unittest.TestCase):
+    def test_parse_fixture(self):
+        self.assertEqual(parse_statistics(STATISTICS_FIXTURE['Statistics']),
+                         {'server_time': 1.25, 'server_rows': 1, 'nodes': 2})
+        self.assertEqual(parse_statistics(None), {'server_time': None, 'server_rows': None, 'nodes': None})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,53 @@
+"""
+The stat=true Statistics block --server-stats relies on (the parser itself is checked offline, in
+tests/test_response_parsing.py)
+- a live stat=true response has that shape, and the Statistics read from the end of the body (what rest_call puts in
+  its events) is the one of the parsed response
+
+The group only runs when selected - `--select-test server_stats`.
+"""
+import unittest
+
+from source import rest_call
+from source.server_stats import parse_statistics
+from contextlib import contextmanager
+
+
+class TestServerStats(unittest.TestCase):
+    group_name = 'server_stats'
+    group_description = 'Testing related to the stat=true query Statistics'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    db_name = None
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def test_live_statistics(self):
+        if not self.conn or not self.db_name:
+            self.skipTest("Missing connection information for query")
+
+        query = f"sql {self.db_name} format=json and stat=true SELECT count(*) AS row_count FROM rand_data"
+        response = rest_call.get_data(self.conn, query)
+        data = response.json()
+        with self.query_context(query):
+            self.assertIn('Statistics', data)
+            parsed = parse_statistics(data['Statistics'])
+            self.assertEqual(parsed['server_rows'], len(data['Query']))
+            self.assertIsNotNone(parsed['server_time'])
+            self.assertGreaterEqual(parsed['nodes'], 1)
+            self.assertEqual(rest_call._statistics(response), data['Statistics'])
+
+
+if __name__ == '__main__':
+    TestServerStats.conn = '127.0.0.1:32349'
+    TestServerStats.db_name = 'new_company'
+    unittest.main(verbosity=2)
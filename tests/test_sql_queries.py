@@ -10,14 +10,18 @@ The following tests basic AnyLog functionality
 
 import os.path
 import unittest
-from source.rest_call import get_data
+from source.rest_call import get_data, get_data_stream
 from source import support
+from source.result_digest import ResultDigest, digest_rows
 from contextlib import contextmanager
 
 
 ROOT_DIR = os.path.dirname(__file__).rsplit('tests', 1)[0]
 
 class TestSQLCommands(unittest.TestCase):
+    group_name = 'sql'
+    group_description = 'Testing related to (basic) data queries'
+
     conn = None
     db_name = None
 
@@ -143,10 +147,9 @@ class TestSQLCommands(unittest.TestCase):
         with self.query_context(query):
             self.assertIn("Query", data)
             self.assertEqual(len(data['Query']), len(expected))
-            for row in data.get('Query'):
-                index = data['Query'].index(row)
-                for key in expected[index]:
-                    self.assertEqual(row.get(key), expected[index].get(key))
+            for row, expected_row in zip(data['Query'], expected):
+                for key in expected_row:
+                    self.assertEqual(row.get(key), expected_row.get(key))
 
     """
     increment testing
@@ -279,10 +282,16 @@ class TestSQLCommands(unittest.TestCase):
 
         query  = "select increments(day, 1, timestamp), min(timestamp) as timestamp, avg(value), count(value), sum(value) from rand_data where timestamp  > '2023-06-30 23:59:59' and timestamp < '2023-08-01 00:00:00' order by timestamp"
         command = f"sql {self.db_name} format=json and stat=false and timezone=utc {query}"
-        results = get_data(self.conn, command)
-        actual = results.json()['Query']
+        # digest the rows while they stream in - the streamed rows are kept to diff them on a mismatch
+        rows = []
+        digest = ResultDigest()
+        for row in get_data_stream(self.conn, command):
+            digest.update(row)
+            rows.append(row)
         with self.query_context(command):
-            self.assertEqual(actual, expected)
+            if digest != digest_rows(expected):
+                self.assertEqual(rows, expected)
+                self.fail(f"result digest {digest.hexdigest()} != expected {digest_rows(expected)}")
 
 
 if __name__ == "__main__":
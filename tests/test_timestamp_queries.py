@@ -8,12 +8,15 @@ The following tests basic AnyLog functionality
 - period
 """
 
+import concurrent.futures
 import os.path
 import unittest
 import datetime
 import random
+import zoneinfo
 
-from source.rest_call import get_data
+from source.rest_call import get_data, with_deadline
+from source import dataset
 from source import support
 from contextlib import contextmanager
 
@@ -22,6 +25,9 @@ from contextlib import contextmanager
 ROOT_DIR = os.path.dirname(__file__).rsplit('tests', 1)[0]
 
 class TestTimestampCommands(unittest.TestCase):
+    group_name = 'timestamp'
+    group_description = 'Testing related to timestamp / timezone formatting queries'
+
     conn = None
     db_name = None
 
@@ -169,6 +175,91 @@ class TestTimestampCommands(unittest.TestCase):
                     )
 
 
+class TestTimezoneMatrix(unittest.TestCase):
+    """
+    test_sql_timezone / test_format_timezones over every IANA zone on the machine (zoneinfo.available_timezones) and
+    the AnyLog short aliases - expected values are computed locally from data/ with zoneinfo, and the queries run
+    concurrently (at most `workers` at a time)
+    """
+    group_name = 'timezone_matrix'
+    group_description = 'Testing related to timezone conversion across every available IANA zone'
+    run_by_default = False
+
+    conn = None
+    db_name = None
+    workers = 16
+
+    # AnyLog `timezone=` aliases -> zone (il is returned as UTC, as in test_format_timezones)
+    aliases = {'utc': 'UTC', 'pt': 'America/Los_Angeles', 'et': 'America/New_York', 'il': 'UTC'}
+    excluded = ('Factory', 'localtime')  # not real zones / machine specific
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.db_name
+
+        table = dataset.load_table('rand_data')
+        column = table[dataset.TIMESTAMP_COLUMN]
+        micros = [column.values[index] for index in range(len(column)) if column.valid[index]]
+        cls.row_count = len(table)
+        cls.min_ts = (dataset.EPOCH + datetime.timedelta(microseconds=min(micros))).replace(tzinfo=datetime.timezone.utc)
+        cls.max_ts = (dataset.EPOCH + datetime.timedelta(microseconds=max(micros))).replace(tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        self.query_base = f"sql {self.db_name} format=json and stat=false "
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _expected(self, zone:str, timestamp_format:str)->dict:
+        tz = zoneinfo.ZoneInfo(zone)
+        return {'min(timestamp)': self.min_ts.astimezone(tz).strftime(timestamp_format),
+                'max(timestamp)': self.max_ts.astimezone(tz).strftime(timestamp_format),
+                'count(*)': self.row_count}
+
+    def _run(self, queries:dict)->dict:
+        """
+        Issue queries ({key: query}) concurrently - {key: first row or the error}
+        """
+        def _query(query:str):
+            try:
+                return get_data(self.conn, query).json().get('Query')[0]
+            except Exception as error:
+                return error
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(queries, executor.map(with_deadline(_query), queries.values())))
+
+    def _check(self, queries:dict, expected:dict):
+        results = self._run(queries)
+        for key, query in queries.items():
+            with self.subTest(timezone=key):
+                with self.query_context(query):
+                    if isinstance(results[key], Exception):
+                        raise AssertionError(f"Failed to query timezone {key} (Error: {results[key]})")
+                    self.assertEqual(results[key], expected[key])
+
+    def test_format_timezones(self):
+        queries = {alias: f"{self.query_base} and timezone={alias} SELECT min(timestamp), max(timestamp), count(*) FROM rand_data"
+                   for alias in self.aliases}
+        expected = {alias: self._expected(zone, '%Y-%m-%dT%H:%M:%S.%fZ' if zone == 'UTC' else '%Y-%m-%d %H:%M:%S.%f')
+                    for alias, zone in self.aliases.items()}
+        self._check(queries, expected)
+
+    def test_sql_timezone(self):
+        zones = sorted(zone for zone in zoneinfo.available_timezones() if zone not in self.excluded)
+        queries = {zone: f"{self.query_base} SELECT min(timestamp)::timezone('{zone}'), max(timestamp)::timezone('{zone}'), count(*) FROM rand_data"
+                   for zone in zones}
+        expected = {zone: self._expected(zone, '%Y-%m-%d %H:%M:%S') for zone in zones}
+        self._check(queries, expected)
+
+
 if __name__ == "__main__":
     TestTimestampCommands.db_name = 'new_company'
     TestTimestampCommands.conn = '50.116.13.109:32149'
@@ -0,0 +1,150 @@
+"""
+Ingest into wide tables - 50, 200 and 1000 (int / decimal / string) columns - through put_data
+- time to first row: a single row PUT (the table and its columns are created on first insert), flush, then poll
+  count(*) until the row is queryable
+- steady state: rows/sec of the PUTs into the (now existing) table, and of the whole load until count(*) matches
+- the table's columns (`get columns`, as in TestAnyLogCommands.test_table_columns) match the generated schema, with
+  types compared through DATA_TYPES_EQUIVALENTS
+- every width is a subTest covering its whole load, so per-test timing / budgets include the measured work
+
+Tables are named wide_[columns] and are only loaded when missing / empty: a table already holding its 1 + steady_rows
+rows (an earlier run) only has its columns checked - drop it to measure its ingest again - and a table holding any
+other row count fails the width. The group only runs when selected - `--select-test wide_schema`.
+"""
+import time
+import unittest
+
+from source import data_generator
+from source.ingest_fingerprint import remote_row_count
+from source.rest_call import flush_buffer, get_data, put_data
+from source import tracing
+from tests.test_anylog_cli import DATA_TYPES_EQUIVALENTS
+from contextlib import contextmanager
+
+TABLE_PREFIX = 'wide'
+SYSTEM_COLUMNS = {'row_id': 'integer', 'insert_timestamp': 'timestamp without time zone', 'tsd_name': 'char(3)',
+                  'tsd_id': 'int'}
+
+
+def _table(columns:int)->str:
+    return f"{TABLE_PREFIX}_{columns}"
+
+
+class TestWideSchema(unittest.TestCase):
+    group_name = 'wide_schema'
+    group_description = 'Testing related to schema creation and ingest rate of tables with many columns'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    operator = None
+    db_name = None
+    widths = (50, 200, 1000)
+    steady_rows = 2000
+    values_per_batch = 50000  # batch size (rows) is values_per_batch / columns
+    wait = 120  # seconds to wait for rows to be queryable
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.operator
+        assert cls.db_name
+
+    @classmethod
+    def _row_count(cls, table:str):
+        try:
+            query = f'sql {cls.db_name} format=json and stat=false "SELECT COUNT(*) AS row_count FROM {table}"'
+            return get_data(cls.conn, query).json()['Query'][0]['row_count']
+        except Exception:
+            return None
+
+    @classmethod
+    def _wait_count(cls, table:str, expected:int)->bool:
+        deadline = time.perf_counter() + cls.wait
+        while time.perf_counter() < deadline:
+            if (cls._row_count(table) or 0) >= expected:
+                return True
+            time.sleep(0.25)
+        return False
+
+    @classmethod
+    def _first_row(cls, table:str, columns:int)->float:
+        """
+        Seconds from the first PUT until the row is queryable - None if it never became queryable
+        """
+        row = next(data_generator.wide_rows(columns, 1, seed=columns))
+        start = time.perf_counter()
+        put_data(conn=cls.operator[0], payload=data_generator.payload([row]), dbms=cls.db_name, table=table)
+        flush_buffer(conn=cls.operator[0], wait=0)
+        if not cls._wait_count(table, 1):
+            return None
+        return time.perf_counter() - start
+
+    @classmethod
+    def _steady_state(cls, table:str, columns:int)->dict:
+        rows = data_generator.wide_rows(columns, cls.steady_rows, seed=columns, first=1)
+        start = time.perf_counter()
+        data_generator.ingest(conns=cls.operator, db_name=cls.db_name, table=table, rows=rows,
+                              batch_size=max(1, cls.values_per_batch // columns))
+        put_time = time.perf_counter() - start
+        flush_buffer(conn=cls.operator, wait=0)
+        queryable = cls._wait_count(table, 1 + cls.steady_rows)
+        total_time = time.perf_counter() - start
+        return {
+            'put_rate': cls.steady_rows / put_time if put_time else 0,
+            'queryable_rate': cls.steady_rows / total_time if queryable and total_time else 0,
+            'queryable': queryable
+        }
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _check_columns(self, columns:int):
+        expected = {**SYSTEM_COLUMNS, **data_generator.wide_column_types(columns)}
+        command = f"get columns where dbms={self.db_name} and table={_table(columns)} and format=json"
+        data = get_data(self.conn, command, destination="").json()
+
+        with self.query_context(command):
+            self.assertEqual(set(expected) - set(SYSTEM_COLUMNS) - set(data), set())
+            for column, data_type in data.items():
+                self.assertIn(column, expected)
+                equivalents = DATA_TYPES_EQUIVALENTS.get(expected[column], [expected[column]])
+                if "char" not in data_type:
+                    self.assertIn(data_type, equivalents)
+                else:
+                    self.assertTrue(any(equivalent in data_type for equivalent in equivalents), data_type)
+
+    def test_wide_schema(self):
+        for columns in self.widths:
+            with self.subTest(columns=columns):
+                table = _table(columns)
+                # a query error raises - only an empty / missing table is loaded, a partial one can't be topped up
+                count = remote_row_count(self.conn, self.db_name, table)
+                if count == 1 + self.steady_rows:
+                    print(f"\t{columns:>5} columns  {count} rows already in {table} - drop it to measure its ingest again")
+                    self._check_columns(columns)
+                    continue
+                if count:
+                    self.fail(f"{table} holds {count} of {1 + self.steady_rows} rows - drop it to load it again")
+                with tracing.span(f"wide schema {columns}", category='ingest', columns=columns):
+                    first_row = self._first_row(table, columns)
+                    self.assertIsNotNone(first_row, f"{table} row not queryable after {self.wait}s")
+                    steady = self._steady_state(table, columns)
+                print(f"\t{columns:>5} columns  first row {first_row:8.2f} s  "
+                      f"PUT {steady['put_rate']:10,.0f} rows/s  end to end {steady['queryable_rate']:10,.0f} rows/s")
+
+                self.assertTrue(steady['queryable'], f"{table} rows not queryable after {self.wait}s")
+                self._check_columns(columns)
+
+
+if __name__ == '__main__':
+    TestWideSchema.conn = '127.0.0.1:32349'
+    TestWideSchema.operator = ['127.0.0.1:32149']
+    TestWideSchema.db_name = 'new_company'
+    unittest.main(verbosity=2)
@@ -0,0 +1,166 @@
+"""
+Cost of increments() and period() as the number of buckets, the time range and the data size grow
+- increments(unit, interval, timestamp) over (second ... year) x interval x range width (1 day ... all data) x
+  dataset scale (power_plant_pv: 100 rows, rand_data: 1500 rows, rand_data + power_plant: 3000 rows, large_results:
+  1M generated rows - the table of the throughput group, inserted through put_data when it is empty)
+    -> rows in all buckets == rows in the range (computed from the local data/ files)
+    -> interval 1: buckets == distinct [unit] values in the range, otherwise between that / interval and that
+- period(unit, interval, date, timestamp) over unit x interval x end date x dataset scale
+    -> row count == rows within interval of the latest timestamp <= date (either end inclusive) - month / year
+       intervals are calendar months, clamped to the last day of a shorter month
+- latency and result rows are printed per combination (each one is a subTest, so --slowest / --results-json keep them)
+
+The group only runs when selected - `--select-test window_sweep`.
+"""
+import bisect
+import calendar
+import datetime
+import time
+import unittest
+
+from source import data_generator
+from source import dataset
+from source.rest_call import get_data
+from tests import test_large_results
+from contextlib import contextmanager
+
+START = datetime.datetime(2023, 1, 1)
+END = datetime.datetime(2026, 1, 1)
+UNITS = ('second', 'minute', 'hour', 'day', 'month', 'year')
+
+
+def _truncate(timestamp:datetime.datetime, unit:str)->tuple:
+    fields = (timestamp.year, timestamp.month, timestamp.day, timestamp.hour, timestamp.minute, timestamp.second)
+    return fields[:{'year': 1, 'month': 2, 'day': 3, 'hour': 4, 'minute': 5, 'second': 6}[unit]]
+
+
+def _window_start(latest:datetime.datetime, unit:str, interval:int)->datetime.datetime:
+    """
+    latest - interval units (calendar months / years for month / year)
+    """
+    if unit in ('month', 'year'):
+        months = latest.year * 12 + latest.month - 1 - interval * (12 if unit == 'year' else 1)
+        year, month = divmod(months, 12)
+        return latest.replace(year=year, month=month + 1, day=min(latest.day, calendar.monthrange(year, month + 1)[1]))
+    if unit not in UNITS:
+        raise ValueError(f"Unsupported period unit {unit} (options: {', '.join(UNITS)})")
+    return latest - datetime.timedelta(**{f"{unit}s": interval})
+
+
+class TestWindowSweep(unittest.TestCase):
+    group_name = 'window_sweep'
+    group_description = 'Testing related to increments / period latency as buckets, time range and data size grow'
+    run_by_default = False
+
+    # Class variables to be set before running tests
+    conn = None
+    operator = None
+    db_name = None
+
+    # dataset scale - tables queried together (first one in FROM, the others with include)
+    scales = (('power_plant_pv',), ('rand_data',), ('rand_data', 'power_plant'), (test_large_results.TABLE,))
+    increments = (('second', 30), ('minute', 1), ('minute', 15), ('hour', 1), ('hour', 6), ('day', 1), ('day', 7),
+                  ('day', 30), ('month', 1), ('month', 3), ('year', 1))
+    range_days = (1, 30, 365, None)  # None - all data
+    periods = (('minute', 30), ('hour', 12), ('day', 7), ('day', 30), ('day', 365), ('month', 1), ('year', 1))
+    period_dates = ('2024-02-15 20:18:29', '2025-12-31 23:59:59')
+
+    @classmethod
+    def setUpClass(cls):
+        assert cls.conn
+        assert cls.operator
+        assert cls.db_name
+
+        # local (UTC) timestamps per table
+        cls.timestamps = {}
+        for scale in cls.scales:
+            for table in scale:
+                if table in cls.timestamps:
+                    continue
+                if table == test_large_results.TABLE:
+                    test_large_results.prepare_table(cls.conn, cls.operator, cls.db_name)
+                    cls.timestamps[table] = sorted(data_generator.START + datetime.timedelta(seconds=row['_offset'])
+                                                   for row in test_large_results.generated_rows())
+                else:
+                    column = dataset.load_table(table)[dataset.TIMESTAMP_COLUMN]
+                    cls.timestamps[table] = sorted(dataset.EPOCH + datetime.timedelta(microseconds=column.values[index])
+                                                   for index in range(len(column)) if column.valid[index])
+
+    def setUp(self):
+        self.query_base = f"sql {self.db_name} format=json and stat=false and timezone=utc"
+
+    @contextmanager
+    def query_context(self, query:str):
+        """Context manager to print query if an assertion fails."""
+        try:
+            yield
+        except AssertionError:
+            print("\n❌ Assertion failed for query:\n", query)
+            raise
+
+    def _query(self, scale:tuple, select:str, where:str)->str:
+        include = f" and include=({', '.join(scale[1:])})" if len(scale) > 1 else ""
+        return f'{self.query_base}{include} "SELECT {select} FROM {scale[0]} WHERE {where}"'
+
+    def _timed(self, query:str, label:str)->list:
+        start = time.perf_counter()
+        rows = get_data(self.conn, query).json().get('Query', [])
+        print(f"\t{label:<72} {(time.perf_counter() - start) * 1000:9.1f} ms  {len(rows):>6} rows")
+        return rows
+
+    def _local(self, scale:tuple)->list:
+        return sorted(timestamp for table in scale for timestamp in self.timestamps[table])
+
+    def test_increments(self):
+        for scale in self.scales:
+            local = self._local(scale)
+            for days in self.range_days:
+                range_end = END if days is None else START + datetime.timedelta(days=days)
+                in_range = local[bisect.bisect_left(local, START):bisect.bisect_left(local, range_end)]
+                distinct_units = {}
+                for unit, interval in self.increments:
+                    with self.subTest(scale='+'.join(scale), unit=unit, interval=interval, days=days or 'all'):
+                        where = f"timestamp >= '{START}' AND timestamp < '{range_end}'"
+                        query = self._query(scale, f"increments({unit}, {interval}, timestamp), min(timestamp) as min_ts, count(*) as row_count", where)
+                        rows = self._timed(query, f"increments({unit}, {interval}) {days or 'all'} day(s) {'+'.join(scale)}")
+
+                        if unit not in distinct_units:
+                            distinct_units[unit] = len({_truncate(timestamp, unit) for timestamp in in_range})
+                        distinct = distinct_units[unit]
+                        with self.query_context(query):
+                            self.assertEqual(sum(row.get('row_count', 0) for row in rows), len(in_range))
+                            if interval == 1:
+                                self.assertEqual(len(rows), distinct)
+                            else:
+                                self.assertGreaterEqual(len(rows), -(-distinct // interval))
+                                self.assertLessEqual(len(rows), distinct)
+
+    def test_period(self):
+        for scale in self.scales:
+            local = self._local(scale)
+            for date in self.period_dates:
+                end = datetime.datetime.fromisoformat(date)
+                position = bisect.bisect_right(local, end)
+                latest = local[position - 1] if position else None
+                for unit, interval in self.periods:
+                    with self.subTest(scale='+'.join(scale), unit=unit, interval=interval, date=date):
+                        query = self._query(scale, "count(*) as row_count", f'period({unit}, {interval}, \'{date}\', timestamp)')
+                        rows = self._timed(query, f"period({unit}, {interval}, {date}) {'+'.join(scale)}")
+
+                        if latest is None:
+                            low = high = 0
+                        else:
+                            window_start = _window_start(latest, unit, interval)
+                            low = position - bisect.bisect_right(local, window_start)
+                            high = position - bisect.bisect_left(local, window_start)
+                        with self.query_context(query):
+                            row_count = rows[0].get('row_count', 0) if rows else 0
+                            self.assertGreaterEqual(row_count, low)
+                            self.assertLessEqual(row_count, high)
+
+
+if __name__ == '__main__':
+    TestWindowSweep.conn = '127.0.0.1:32349'
+    TestWindowSweep.operator = ['127.0.0.1:32149']
+    TestWindowSweep.db_name = 'new_company'
+    unittest.main(verbosity=2)